@@ -6,7 +6,7 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[('src/web/templates', 'src/web/templates'), ('logo.ico', '.')], 
-    hiddenimports=['src.web', 'src.bot', 'pystray', 'PIL', 'pandas', 'openpyxl'],
+    hiddenimports=['src.web', 'src.bot', 'pystray', 'PIL', 'openpyxl'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
@@ -0,0 +1,108 @@
+"""
+Microbenchmark: compiled bell schedule vs. the original get_status loops.
+
+Usage:
+    python benchmarks/bench_schedule.py
+"""
+import os
+import sys
+import timeit
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.common.schedule import CompiledSchedule
+
+# A typical 14-slot day: 8 lessons, breaks, lunch and 2 study hours
+SCHEDULE = [
+    {"name": "1. Ders", "start": "08:30", "end": "09:10"},
+    {"name": "Teneffüs", "start": "09:10", "end": "09:20"},
+    {"name": "2. Ders", "start": "09:20", "end": "10:00"},
+    {"name": "Teneffüs", "start": "10:00", "end": "10:10"},
+    {"name": "3. Ders", "start": "10:10", "end": "10:50"},
+    {"name": "4. Ders", "start": "11:00", "end": "11:40"},
+    {"name": "5. Ders", "start": "11:50", "end": "12:30"},
+    {"name": "Öğle Arası", "start": "12:30", "end": "13:20"},
+    {"name": "6. Ders", "start": "13:20", "end": "14:00"},
+    {"name": "7. Ders", "start": "14:10", "end": "14:50"},
+    {"name": "8. Ders", "start": "15:00", "end": "15:40"},
+    {"name": "Teneffüs", "start": "15:40", "end": "15:50"},
+    {"name": "1. Etüt", "start": "15:50", "end": "16:30"},
+    {"name": "2. Etüt", "start": "16:40", "end": "17:20"},
+]
+
+
+def legacy_lookup(schedule, current_time_str):
+    """The three schedule passes from the original get_status()."""
+    current_status = "Ders Dışı"
+    current_time = datetime.strptime(current_time_str, "%H:%M")
+    for item in schedule:
+        try:
+            start_time = datetime.strptime(item['start'], "%H:%M")
+            end_time = datetime.strptime(item['end'], "%H:%M")
+            if start_time <= current_time <= end_time:
+                current_status = item['name']
+                break
+        except (ValueError, KeyError):
+            continue
+
+    lesson_count = 0
+    calculated_index = -1
+    for item in schedule:
+        try:
+            s = datetime.strptime(item['start'], "%H:%M")
+            e = datetime.strptime(item['end'], "%H:%M")
+            if "Ders" in item.get('name', '') or "Etüt" in item.get('name', ''):
+                if s <= current_time <= e:
+                    calculated_index = lesson_count
+                lesson_count += 1
+        except (ValueError, KeyError):
+            pass
+
+    next_lesson_index = -1
+    if calculated_index == -1:
+        next_lesson_count = 0
+        for item in schedule:
+            try:
+                s = datetime.strptime(item['start'], "%H:%M")
+                if "Ders" in item.get('name', '') or "Etüt" in item.get('name', ''):
+                    if s > current_time:
+                        next_lesson_index = next_lesson_count
+                        break
+                    next_lesson_count += 1
+            except (ValueError, KeyError):
+                continue
+
+    return current_status, calculated_index, next_lesson_index
+
+
+def compiled_lookup(compiled, minute):
+    state = compiled.at(minute)
+    next_index = state.next_lesson_index if state.lesson_index == -1 else -1
+    return (state.slot.name if state.slot else "Ders Dışı"), state.lesson_index, next_index
+
+
+def main():
+    compiled = CompiledSchedule(SCHEDULE)
+    minutes = list(range(24 * 60))
+    times = [f"{m // 60:02d}:{m % 60:02d}" for m in minutes]
+
+    # Both implementations must agree on every minute of the day
+    for m, t in zip(minutes, times):
+        assert legacy_lookup(SCHEDULE, t) == compiled_lookup(compiled, m), t
+
+    rounds = 5
+    legacy = min(timeit.repeat(lambda: [legacy_lookup(SCHEDULE, t) for t in times], number=1, repeat=rounds))
+    fast = min(timeit.repeat(lambda: [compiled_lookup(compiled, m) for m in minutes], number=1, repeat=rounds))
+    build = min(timeit.repeat(lambda: CompiledSchedule(SCHEDULE), number=100, repeat=rounds)) / 100
+
+    per_legacy = legacy / len(minutes) * 1e6
+    per_fast = fast / len(minutes) * 1e6
+    print(f"Slots: {len(SCHEDULE)}, lookups: {len(minutes)} (one per minute of the day)")
+    print(f"Legacy loops : {per_legacy:8.2f} us/lookup")
+    print(f"Compiled     : {per_fast:8.2f} us/lookup  ({per_legacy / per_fast:.0f}x faster)")
+    print(f"Compile cost : {build * 1e6:8.2f} us (once per data version)")
+
+
+if __name__ == '__main__':
+    main()
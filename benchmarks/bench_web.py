@@ -0,0 +1,210 @@
+"""
+Web API benchmarks on a synthetic large-school dataset.
+
+Builds a temporary data.json + slideshow folder (see fixtures.py), points the
+app at it and times the hot paths through app.test_client(). Results are written
+as JSON so runs can be compared.
+
+Usage:
+    python benchmarks/bench_web.py                       # results/web-<timestamp>.json
+    python benchmarks/bench_web.py --slides 5000 --rounds 50
+    python benchmarks/bench_web.py --compare benchmarks/results/web-20260101-120000.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from benchmarks import fixtures
+
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+# A Tuesday, so lessons, breaks and class statuses are all exercised
+REPLAY_DAY = datetime(2026, 3, 10)
+
+
+def measure(func, rounds):
+    """Run func `rounds` times, return timing stats in milliseconds."""
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        'rounds': rounds,
+        'min_ms': round(samples[0], 3),
+        'median_ms': round(statistics.median(samples), 3),
+        'p95_ms': round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+        'mean_ms': round(statistics.fmean(samples), 3),
+    }
+
+
+def use_data_files(workdir):
+    """
+    Keep the store away from the real data files. It is created when data_store
+    is first imported (fixtures.generate_data does), before the fixture exists,
+    so it starts on empty files in workdir; setup_app() then loads the fixture.
+    """
+    import config
+    config.DATA_FILE = os.path.join(workdir, 'empty.json')
+    config.SQLITE_FILE = os.path.join(workdir, 'empty.sqlite3')
+
+
+def setup_app(workdir, data, slide_count):
+    """Import the app with its data file, slide folder and log file inside workdir."""
+    os.chdir(workdir)  # launcher.log is created relative to the working directory
+    data_path = os.path.join(workdir, 'data.json')
+    with open(data_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+    slides_dir = os.path.join(workdir, 'slideshow')
+    fixtures.create_slides(slides_dir, slide_count)
+    os.makedirs(os.path.join(workdir, 'riddles'))
+
+    import config
+    from src.common.data_store import store
+    from src.common.media_index import slides_index, riddles_index
+    from src.common.media_manifest import manifest
+    from src.web import app as web_app
+
+    config.update_env_file = lambda updates: None  # Never touch the real .env
+    if config.STORAGE_ENGINE == 'sqlite':
+        # A new database seeded from the fixture, like the first start after switching
+        store.use_file(os.path.join(workdir, 'data.sqlite3'), migrate_from=data_path)
+    else:
+        store.use_file(data_path)
+    manifest.use_file(os.path.join(workdir, 'media_manifest.json'))
+    slides_index.directory = slides_dir
+    riddles_index.directory = os.path.join(workdir, 'riddles')
+    slides_index.invalidate()
+    riddles_index.invalidate()
+    return web_app
+
+
+def check(response):
+    assert response.status_code in (200, 304), response.status_code
+    return response
+
+
+def run(args):
+    workdir = tempfile.mkdtemp(prefix='pano-bench-')
+    use_data_files(workdir)
+    data = fixtures.generate_data(classes=args.classes, birthdays=args.birthdays,
+                                  duty_locations=args.duty_locations)
+    try:
+        web_app = setup_app(workdir, data, args.slides)
+        import config
+        from src.common.data_store import store, read_data, update_data
+
+        client = web_app.app.test_client()
+        with client.session_transaction() as sess:
+            sess['admin_logged_in'] = True
+        form = fixtures.settings_form(data)
+        rounds = args.rounds
+        lesson_time = REPLAY_DAY.replace(hour=9, minute=40)
+        web_app.clock = lambda: lesson_time
+
+        def cold_load():
+            store.invalidate()
+            read_data()
+
+        # JSON: invalidate() forces a re-parse of data.json. SQLite: it only re-checks
+        # the stored data version and keeps the snapshot, so the row is named for that
+        cold_case = 'read_data (version check)' if config.STORAGE_ENGINE == 'sqlite' else 'read_data (cold parse)'
+        results = {
+            cold_case: measure(cold_load, rounds),
+            'update_data (no change)': measure(lambda: update_data(lambda data: None), rounds),
+            'get_status (full)': measure(lambda: check(client.get('/api/get_status')), rounds),
+        }
+        etag = client.get('/api/get_status').headers.get('ETag', '')
+        results['get_status (304)'] = measure(
+            lambda: check(client.get('/api/get_status', headers={'If-None-Match': etag})), rounds)
+        results['get_slides'] = measure(lambda: check(client.get('/api/get_slides')), rounds)
+        results['get_slides_with_info (page)'] = measure(
+            lambda: check(client.get('/api/get_slides_with_info?sort=newest&limit=60')), rounds)
+        results['index'] = measure(lambda: check(client.get('/')), rounds)
+        results['admin page'] = measure(lambda: check(client.get('/admin')), max(rounds // 5, 3))
+        results['handle_save_settings (POST /admin)'] = measure(
+            lambda: check(client.post('/admin', data=form)), max(rounds // 5, 3))
+
+        # Replay a whole school day, one status request per minute
+        minutes = [REPLAY_DAY + timedelta(minutes=m) for m in range(24 * 60)]
+        start = time.perf_counter()
+        for moment in minutes:
+            web_app.clock = lambda: moment
+            check(client.get('/api/get_status'))
+        replay_seconds = time.perf_counter() - start
+
+        return {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'fixture': {
+                'classes': args.classes, 'lessons_per_day': 10, 'birthdays': args.birthdays,
+                'duty_locations': args.duty_locations, 'slides': args.slides,
+                'storage_engine': config.STORAGE_ENGINE,
+                # The sqlite engine moves data.json aside when it migrates it
+                'data_json_bytes': len(json.dumps(data, ensure_ascii=False).encode('utf-8')),
+            },
+            'results': results,
+            'day_replay': {'requests': len(minutes), 'seconds': round(replay_seconds, 3)},
+        }
+    finally:
+        os.chdir(ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def print_report(report, baseline=None):
+    fx = report['fixture']
+    print(f"Fixture: {fx['classes']} classes, {fx['birthdays']} birthdays, {fx['duty_locations']} duty spots, "
+          f"{fx['slides']} slides, data.json {fx['data_json_bytes'] / 1024:.0f} KB")
+    print(f"{'case':40} {'median':>10} {'p95':>10}" + (f" {'baseline':>10} {'change':>8}" if baseline else ''))
+    for name, stats in report['results'].items():
+        line = f"{name:40} {stats['median_ms']:>8.2f}ms {stats['p95_ms']:>8.2f}ms"
+        old = (baseline or {}).get('results', {}).get(name)
+        if old:
+            change = (stats['median_ms'] - old['median_ms']) / old['median_ms'] * 100 if old['median_ms'] else 0
+            line += f" {old['median_ms']:>8.2f}ms {change:>+7.0f}%"
+        print(line)
+    replay = report['day_replay']
+    print(f"Day replay: {replay['requests']} status requests in {replay['seconds']:.2f}s")
+    if baseline and 'day_replay' in baseline:
+        print(f"  baseline: {baseline['day_replay']['seconds']:.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--classes', type=int, default=80)
+    parser.add_argument('--birthdays', type=int, default=3000)
+    parser.add_argument('--duty-locations', type=int, default=40)
+    parser.add_argument('--slides', type=int, default=3000)
+    parser.add_argument('--rounds', type=int, default=30)
+    parser.add_argument('--output', help="Result file (default: benchmarks/results/web-<timestamp>.json)")
+    parser.add_argument('--compare', help="Earlier result file to compare against")
+    args = parser.parse_args()
+
+    report = run(args)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"web-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"Saved {output}")
+
+
+if __name__ == '__main__':
+    main()
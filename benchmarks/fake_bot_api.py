@@ -0,0 +1,305 @@
+"""
+Local fake Bot API server for testing the bot without Telegram.
+
+Answers the few methods the bot calls (getMe, setMyCommands, setWebhook,
+deleteWebhook, getUpdates, getFile, sendMessage) plus file downloads, records
+every sendMessage and can push updates either to the registered webhook (with
+its secret token) or to the getUpdates long-poll queue.
+
+Run against the real bot in both delivery modes and compare the time from
+"update sent" to "reply received":
+
+    python benchmarks/fake_bot_api.py                 # polling and webhook, 50 updates each
+    python benchmarks/fake_bot_api.py --mode webhook --updates 200
+    python benchmarks/fake_bot_api.py --slow-upload 5 # other users while one upload downloads
+
+With --slow-upload one user sends a video whose download takes that many
+seconds (junk bytes, ingest rejects it, nothing is published); the other users'
+commands and the uploader's own next command must still be answered at once.
+
+The bot is started as run_bot.py with BOT_API_URL pointing here.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BOT_ID = 4242
+TOKEN = f"{BOT_ID}:fake-token"
+USER_ID = 1001
+UPLOADER_ID = 2001
+RUSH_USERS = [3001, 3002, 3003, 3004, 3005]
+
+
+class QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        if not isinstance(sys.exc_info()[1], ConnectionError):  # Bot process stopped mid-poll
+            super().handle_error(request, client_address)
+
+
+class FakeBotApi:
+    def __init__(self, host='127.0.0.1', port=0, file_seconds=0.0):
+        self.file_seconds = file_seconds  # How long each file download takes
+        self.webhook_url = ''
+        self.secret_token = ''
+        self.sent = []  # (monotonic time, params) of every sendMessage
+        self.pending = []  # Updates waiting for getUpdates
+        self._next_update_id = 1
+        self._next_message_id = 1
+        self._cond = threading.Condition()
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True  # Headers and body are separate writes
+
+            def do_GET(self):
+                if '/file/' not in self.path:
+                    return self.do_POST()
+                # Junk bytes trickled over file_seconds, like a large video on a slow line
+                chunks = 10
+                self.send_response(200)
+                self.send_header('Content-Length', str(chunks * 1024))
+                self.end_headers()
+                for _ in range(chunks):
+                    time.sleep(api.file_seconds / chunks)
+                    self.wfile.write(b'\0' * 1024)
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length).decode('utf-8') if length else ''
+                method = self.path.rsplit('/', 1)[-1]
+                result = api.call(method, api.parse(self.headers.get('Content-Type', ''), body))
+                payload = json.dumps({'ok': True, 'result': result}).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = QuietServer((host, port), Handler)
+        self.url = f"http://{host}:{self.server.server_address[1]}/bot"
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    @staticmethod
+    def parse(content_type, body):
+        if 'json' in content_type:
+            return json.loads(body or '{}')
+        params = {}
+        for key, value in parse_qsl(body):
+            try:
+                params[key] = json.loads(value)  # Complex values arrive JSON encoded
+            except ValueError:
+                params[key] = value
+        return params
+
+    def call(self, method, params):
+        if method == 'getMe':
+            return {'id': BOT_ID, 'is_bot': True, 'first_name': 'Pano', 'username': 'fake_pano_bot',
+                    'can_join_groups': False, 'can_read_all_group_messages': False,
+                    'supports_inline_queries': False}
+        if method == 'setWebhook':
+            with self._cond:
+                self.webhook_url = params.get('url', '')
+                self.secret_token = params.get('secret_token', '')
+                self._cond.notify_all()
+            return True
+        if method == 'deleteWebhook':
+            with self._cond:
+                self.webhook_url = self.secret_token = ''
+            return True
+        if method == 'getUpdates':
+            return self._get_updates(int(params.get('offset') or 0), float(params.get('timeout') or 0))
+        if method == 'getFile':
+            file_id = str(params.get('file_id', ''))
+            return {'file_id': file_id, 'file_unique_id': file_id, 'file_size': 10240,
+                    'file_path': f"videos/{file_id}.mp4"}
+        if method == 'sendMessage':
+            with self._cond:
+                self.sent.append((time.monotonic(), params))
+                message_id = self._next_message_id
+                self._next_message_id += 1
+                self._cond.notify_all()
+            return {'message_id': message_id, 'date': int(time.time()), 'text': params.get('text', ''),
+                    'chat': {'id': int(params.get('chat_id', 0)), 'type': 'private'}}
+        return True  # setMyCommands and anything else the bot may call
+
+    def _get_updates(self, offset, timeout):
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self.pending = [u for u in self.pending if u['update_id'] >= offset]
+            while not self.pending and time.monotonic() < deadline:
+                self._cond.wait(deadline - time.monotonic())
+            return list(self.pending)
+
+    def make_update(self, text, user_id=USER_ID):
+        with self._cond:
+            update_id = self._next_update_id
+            self._next_update_id += 1
+        message = {'message_id': update_id, 'date': int(time.time()), 'text': text,
+                   'chat': {'id': user_id, 'type': 'private'},
+                   'from': {'id': user_id, 'is_bot': False, 'first_name': 'Test'}}
+        if text.startswith('/'):
+            message['entities'] = [{'type': 'bot_command', 'offset': 0, 'length': len(text.split()[0])}]
+        return {'update_id': update_id, 'message': message}
+
+    def make_upload(self, user_id):
+        update = self.make_update('', user_id)
+        message = update['message']
+        del message['text']
+        file_id = f"video{update['update_id']}"
+        message['document'] = {'file_id': file_id, 'file_unique_id': file_id, 'file_name': 'ders.mp4',
+                               'mime_type': 'video/mp4', 'file_size': 10240}
+        return update
+
+    def replies(self, chat_id):
+        return [(at, params) for at, params in self.sent if int(params.get('chat_id', 0)) == chat_id]
+
+    def queue_update(self, update):
+        """Deliver through getUpdates (polling mode)."""
+        with self._cond:
+            self.pending.append(update)
+            self._cond.notify_all()
+
+    def push_update(self, update, secret_token=None):
+        """POST to the registered webhook like Telegram does; returns the HTTP status."""
+        request = urllib.request.Request(
+            self.webhook_url, data=json.dumps(update).encode('utf-8'), method='POST',
+            headers={'Content-Type': 'application/json',
+                     'X-Telegram-Bot-Api-Secret-Token': self.secret_token if secret_token is None else secret_token})
+        try:
+            with urllib.request.urlopen(request, timeout=10) as response:
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+    def wait_for(self, predicate, timeout):
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while not predicate():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+
+def start_bot(api, mode, port):
+    admins = ','.join(str(i) for i in [USER_ID, UPLOADER_ID] + RUSH_USERS)
+    env = dict(os.environ, BOT_TOKEN=TOKEN, ADMIN_IDS=admins, BOT_API_URL=api.url,
+               BOT_MODE=mode, BOT_WEBHOOK_URL=f"http://127.0.0.1:{port}/telegram",
+               BOT_WEBHOOK_PORT=str(port), BUS_PORT='0', PYTHONUNBUFFERED='1')
+    return subprocess.Popen([sys.executable, os.path.join(ROOT, 'run_bot.py')], env=env, cwd=ROOT,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def run_rush(api, deliver, upload_seconds):
+    """One slow upload, then everyone (the uploader too) sends a command."""
+    start = time.monotonic()
+    deliver(api.make_upload(UPLOADER_ID))
+    if not api.wait_for(lambda: api.replies(UPLOADER_ID), upload_seconds + 10):
+        raise SystemExit("Upload was not acknowledged")
+    acked = api.replies(UPLOADER_ID)[0][0] - start
+
+    start = time.monotonic()
+    for user_id in RUSH_USERS + [UPLOADER_ID]:
+        deliver(api.make_update('/id', user_id))
+    if not api.wait_for(lambda: all(api.replies(u) for u in RUSH_USERS) and len(api.replies(UPLOADER_ID)) >= 2,
+                        upload_seconds + 10):
+        raise SystemExit("Commands were not answered")
+    others = [api.replies(u)[0][0] - start for u in RUSH_USERS]
+    own = api.replies(UPLOADER_ID)[1][0] - start
+
+    if not api.wait_for(lambda: len(api.replies(UPLOADER_ID)) >= 3, upload_seconds + 30):
+        raise SystemExit("Upload result missing")
+    done = api.replies(UPLOADER_ID)[2][0] - start
+    print(f"  upload acknowledged in {acked * 1000:.0f} ms, finished after {done:.1f} s")
+    print(f"  during the download: other users answered in {max(others) * 1000:.0f} ms (max), "
+          f"uploader's next command in {own * 1000:.0f} ms")
+
+
+def run_mode(mode, updates, port, upload_seconds=0.0):
+    api = FakeBotApi(file_seconds=upload_seconds)
+    api.start()
+    bot = start_bot(api, mode, port)
+    try:
+        if mode == 'webhook':
+            if not api.wait_for(lambda: api.webhook_url, 30):
+                raise SystemExit("Bot did not register a webhook")
+            status = api.push_update(api.make_update('/id'), secret_token='wrong')
+            print(f"  wrong secret -> HTTP {status}")
+            if status != 403:
+                raise SystemExit("Webhook accepted an update with a wrong secret token")
+        deliver = api.queue_update if mode == 'polling' else api.push_update
+
+        # Warm-up round (first handler call imports and allocates)
+        deliver(api.make_update('/id'))
+        if not api.wait_for(lambda: len(api.sent) >= 1, 30):
+            raise SystemExit(f"No reply from the bot in {mode} mode")
+
+        samples = []
+        for _ in range(updates):
+            count = len(api.sent)
+            start = time.monotonic()
+            deliver(api.make_update('/id'))
+            if not api.wait_for(lambda: len(api.sent) > count, 10):
+                raise SystemExit(f"Reply missing in {mode} mode")
+            samples.append((api.sent[count][0] - start) * 1000)
+        samples.sort()
+        if upload_seconds:
+            run_rush(api, deliver, upload_seconds)
+        return {
+            'mode': mode,
+            'updates': updates,
+            'mean_ms': round(statistics.mean(samples), 2),
+            'p50_ms': round(samples[len(samples) // 2], 2),
+            'p95_ms': round(samples[int(len(samples) * 0.95) - 1], 2),
+        }
+    finally:
+        bot.terminate()
+        try:
+            bot.wait(10)
+        except subprocess.TimeoutExpired:
+            bot.kill()
+        api.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mode', choices=['polling', 'webhook', 'both'], default='both')
+    parser.add_argument('--updates', type=int, default=50)
+    parser.add_argument('--port', type=int, default=18443, help='webhook listener port for the bot')
+    parser.add_argument('--slow-upload', type=float, default=0.0, metavar='SECONDS',
+                        help='also time commands while one upload takes this long to download')
+    args = parser.parse_args()
+    modes = ['polling', 'webhook'] if args.mode == 'both' else [args.mode]
+    for mode in modes:
+        print(f"{mode}:")
+        result = run_mode(mode, args.updates, args.port, args.slow_upload)
+        print(f"  {result['updates']} updates: mean {result['mean_ms']} ms, "
+              f"p50 {result['p50_ms']} ms, p95 {result['p95_ms']} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+Synthetic large-school data for the benchmarks.
+
+    generate_data()            -> data.json content (80 classes x 10 lessons, 3000 birthdays, 40 duty spots)
+    create_slides(folder, n)   -> n small uuid-named slide files
+"""
+import os
+import random
+import uuid
+
+DAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
+SUBJECTS = ['Matematik', 'Türkçe', 'Fizik', 'Kimya', 'Biyoloji', 'Tarih', 'Coğrafya',
+            'İngilizce', 'Almanca', 'Din Kültürü', 'Beden Eğitimi', 'Müzik', 'Görsel Sanatlar',
+            'Felsefe', 'Edebiyat', 'Bilişim']
+FIRST_NAMES = ['Ahmet', 'Mehmet', 'Ayşe', 'Fatma', 'Zeynep', 'Elif', 'Mustafa', 'Emre',
+               'Yusuf', 'Merve', 'Can', 'Deniz', 'Ece', 'Burak', 'Selin', 'Kerem']
+LAST_NAMES = ['Yılmaz', 'Kaya', 'Demir', 'Şahin', 'Çelik', 'Yıldız', 'Öztürk', 'Aydın',
+              'Arslan', 'Doğan', 'Kılıç', 'Aslan', 'Koç', 'Kurt', 'Polat', 'Özdemir']
+
+# Minimal valid JPEG header is enough: the index only lists the files
+SLIDE_BYTES = b'\xff\xd8\xff\xe0' + b'\x00' * 2048
+
+
+def bell_schedule(lessons=10, start=8 * 60 + 30, lesson_minutes=40, break_minutes=10):
+    """Lessons with breaks in between; the last two lessons are study hours (Etüt)."""
+    schedule = []
+    minute = start
+    for i in range(lessons):
+        name = f"{i + 1}. Ders" if i < lessons - 2 else f"{i - lessons + 3}. Etüt"
+        end = minute + lesson_minutes
+        schedule.append({'name': name, 'start': f"{minute // 60:02d}:{minute % 60:02d}",
+                         'end': f"{end // 60:02d}:{end % 60:02d}"})
+        if i < lessons - 1:
+            pause = 50 if i == 4 else break_minutes  # Lunch after the 5th lesson
+            schedule.append({'name': 'Öğle Arası' if i == 4 else 'Teneffüs',
+                             'start': f"{end // 60:02d}:{end % 60:02d}",
+                             'end': f"{(end + pause) // 60:02d}:{(end + pause) % 60:02d}"})
+            minute = end + pause
+    return schedule
+
+
+def person(rng):
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+
+def generate_data(classes=80, lessons=10, birthdays=3000, duty_locations=40, seed=42):
+    rng = random.Random(seed)
+    grades = ['9', '10', '11', '12']
+    class_names = [f"{grades[i % 4]}-{chr(ord('A') + i // 4)}" for i in range(classes)]
+
+    data = {
+        'school_name': 'Benchmark Anadolu Lisesi',
+        'schedule': bell_schedule(lessons),
+        'class_schedules': [
+            {'name': name, 'program': {day: [rng.choice(SUBJECTS) for _ in range(lessons)] for day in DAYS}}
+            for name in class_names
+        ],
+        'duty_roster': [
+            {'location': f"Kat {i // 4 + 1} - Koridor {i % 4 + 1}", 'schedule': {day: person(rng) for day in DAYS}}
+            for i in range(duty_locations)
+        ],
+        'birthdays': [
+            {'name': person(rng), 'date': f"{rng.randint(1, 28):02d}.{rng.randint(1, 12):02d}"}
+            for _ in range(birthdays)
+        ],
+        'messages': [f"Duyuru {i + 1}: Veli toplantısı cuma günü saat 15:00'te." for i in range(20)],
+        'quotes': [f"Söz {i + 1}: Bilgi güçtür." for i in range(50)],
+        'countdown': {'label': 'YKS', 'target_date': '2027-06-19'},
+        'duty_rotation': {'auto_rotate': False, 'last_week_number': 0},
+    }
+    # Imported here: importing data_store creates the store (see bench_web.use_data_files)
+    from src.common.data_store import merge_with_defaults
+    return merge_with_defaults(data)
+
+
+def create_slides(folder, count, seed=42):
+    """Create `count` uuid-named slide files (90% images, 10% videos) with spread-out mtimes."""
+    os.makedirs(folder, exist_ok=True)
+    rng = random.Random(seed)
+    base = 1_700_000_000
+    for i in range(count):
+        ext = '.mp4' if i % 10 == 0 else '.jpg'
+        path = os.path.join(folder, f"{uuid.UUID(int=rng.getrandbits(128))}{ext}")
+        with open(path, 'wb') as f:
+            f.write(SLIDE_BYTES)
+        os.utime(path, (base + i * 60, base + i * 60))
+
+
+def settings_form(data):
+    """The form the admin panel posts for action=save_settings, built from `data`."""
+    form = {
+        'action': 'save_settings',
+        'school_name': data['school_name'],
+        'messages': '\\n'.join(data['messages']),
+        'quotes': '\\n'.join(data['quotes']),
+        'countdown_label': data['countdown']['label'],
+        'countdown_date': data['countdown']['target_date'],
+        'slideshow_duration': str(data['slideshow']['duration'] // 1000),
+        'schedule_name[]': [s['name'] for s in data['schedule']],
+        'schedule_start[]': [s['start'] for s in data['schedule']],
+        'schedule_end[]': [s['end'] for s in data['schedule']],
+        'location[]': [d['location'] for d in data['duty_roster']],
+        'layout_id[]': [c['id'] for c in data['layout']],
+        'layout_title[]': [c['title'] for c in data['layout']],
+        'layout_type[]': [c['type'] for c in data['layout']],
+    }
+    for day in DAYS:
+        form[f'{day}[]'] = [d['schedule'][day] for d in data['duty_roster']]
+    for card in data['layout']:
+        if card['visible']:
+            form[f"layout_visible_{card['id']}"] = 'on'
+    for i, cls in enumerate(data['class_schedules']):
+        form[f'class_name_{i}'] = cls['name']
+        for day in DAYS:
+            form[f'schedule_{i}_{day}[]'] = cls['program'][day]
+    return form
@@ -38,6 +38,11 @@ os.makedirs(DATA_DIR, exist_ok=True)
 
 DATA_FILE = os.path.join(DATA_DIR, 'data.json')
 
+# Storage engine: "json" (data.json) or "sqlite" (data.sqlite3, row-level updates,
+# for boards with thousands of birthdays). data.json is migrated once on first start.
+STORAGE_ENGINE = os.getenv("STORAGE_ENGINE", "json").lower()
+SQLITE_FILE = os.path.join(DATA_DIR, 'data.sqlite3')
+
 # Web Configuration
 # Templates and static files are always at the same relative path
 WEB_STATIC_DIR = os.path.join(RESOURCE_DIR, 'src', 'web', 'static')
@@ -49,6 +54,24 @@ RIDDLES_DIR = os.path.join(WEB_STATIC_DIR, 'riddles')
 # Network Configuration
 WEB_PORT = int(os.getenv("WEB_PORT", 7000))
 
+# Web Server: "pooled" (thread pool + keep-alive) or "dev" (Flask's development server)
+WEB_SERVER = os.getenv("WEB_SERVER", "pooled").lower()
+# Workers for regular requests (open SSE streams do not use one)
+WEB_THREADS = int(os.getenv("WEB_THREADS", 16))
+WEB_KEEPALIVE_TIMEOUT = int(os.getenv("WEB_KEEPALIVE_TIMEOUT", 5))  # seconds, idle between requests
+# A request or response may stall this long (paused video download, slow Wi-Fi upload)
+WEB_IO_TIMEOUT = int(os.getenv("WEB_IO_TIMEOUT", 300))  # seconds
+WEB_SHUTDOWN_TIMEOUT = int(os.getenv("WEB_SHUTDOWN_TIMEOUT", 5))  # seconds
+
+# Live Updates (Server-Sent Events)
+# All streams share one thread; kiosks beyond this many open streams fall back to polling
+STREAM_MAX_CLIENTS = int(os.getenv("STREAM_MAX_CLIENTS", 256))
+STREAM_HEARTBEAT = int(os.getenv("STREAM_HEARTBEAT", 15))  # seconds
+
+# Change bus: the bot notifies the web app over UDP on 127.0.0.1 when they run
+# as separate processes (run_bot.py / run_web.py). 0 disables the socket.
+BUS_PORT = int(os.getenv("BUS_PORT", 7001))
+
 # Bot Configuration
 # User should set these in .env or here
 BOT_TOKEN = os.getenv("BOT_TOKEN", "YOUR_BOT_TOKEN_HERE")
@@ -65,9 +88,41 @@ ALLOWED_USERS_FILE = os.path.join(DATA_DIR, 'allowed_users.json')
 
 # Network Configuration (School Network Support)
 BOT_API_URL = os.getenv("BOT_API_URL", None)
+# File downloads of a local Bot API server: ".../bot" -> ".../file/bot" unless set
+BOT_API_FILE_URL = os.getenv("BOT_API_FILE_URL") or (
+    BOT_API_URL[:-len("bot")] + "file/bot" if BOT_API_URL and BOT_API_URL.endswith("/bot") else None)
 # Default to True unless explicitly set to False/0
 BOT_SSL_VERIFY = os.getenv("BOT_SSL_VERIFY", "True").lower() in ("true", "1", "yes")
 
+# Update delivery: "polling" (getUpdates, default) or "webhook" (the Bot API POSTs
+# updates to BOT_WEBHOOK_URL, which must reach the listener below, e.g. via a
+# reverse proxy). The listener serves the path of BOT_WEBHOOK_URL.
+BOT_MODE = os.getenv("BOT_MODE", "polling").lower()
+BOT_WEBHOOK_URL = os.getenv("BOT_WEBHOOK_URL", "")
+BOT_WEBHOOK_LISTEN = os.getenv("BOT_WEBHOOK_LISTEN", "127.0.0.1")
+BOT_WEBHOOK_PORT = int(os.getenv("BOT_WEBHOOK_PORT", 8443))
+# Checked against the X-Telegram-Bot-Api-Secret-Token header; random per start if empty
+BOT_WEBHOOK_SECRET = os.getenv("BOT_WEBHOOK_SECRET", "")
+
+# Updates of different users are handled concurrently (one user's stay in order)
+BOT_CONCURRENT_UPDATES = int(os.getenv("BOT_CONCURRENT_UPDATES", 8))
+# Uploads are acknowledged at once and downloaded in the background, this many at a time
+BOT_DOWNLOADS = int(os.getenv("BOT_DOWNLOADS", 3))
+
+# Media Ingest (bot uploads are staged, normalized, then published)
+MEDIA_STAGING_DIR = os.path.join(DATA_DIR, 'staging')
+MEDIA_QUARANTINE_DIR = os.path.join(DATA_DIR, 'quarantine')
+# Images are downscaled to fit the panel screen
+PANEL_WIDTH = int(os.getenv("PANEL_WIDTH", 1920))
+PANEL_HEIGHT = int(os.getenv("PANEL_HEIGHT", 1080))
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", 2))
+# Admin gallery thumbnails / video posters (sidecar cache)
+THUMBNAIL_DIR = os.path.join(DATA_DIR, 'thumbs')
+# Telegram file ids / content hashes of published uploads (duplicate detection)
+UPLOAD_INDEX_FILE = os.path.join(DATA_DIR, 'upload_index.json')
+# MIME type, dimensions, duration, size, hash and uploader of every slide / riddle
+MEDIA_MANIFEST_FILE = os.path.join(DATA_DIR, 'media_manifest.json')
+
 # Ensure directories exist
 os.makedirs(SLIDESHOW_DIR, exist_ok=True)
 
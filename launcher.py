@@ -1,13 +1,14 @@
+import time
+STARTED = time.perf_counter()
+
 import subprocess
 import threading
-import time
 import os
 import sys
+import json
+import urllib.request
 import webbrowser
 import logging
-from PIL import Image
-import pystray
-from pystray import MenuItem as item
 
 import config
 
@@ -24,21 +25,47 @@ logger = logging.getLogger("Launcher")
 
 # Globals to manage threads/processes if needed
 stop_event = threading.Event()
+web_server = None
+
+# (phase, seconds since launcher start), logged once the kiosk is up
+startup_phases = []
+
+def mark_phase(name):
+    startup_phases.append((name, time.perf_counter() - STARTED))
+
+def log_startup_timing():
+    previous = 0.0
+    parts = []
+    for name, at in startup_phases:
+        parts.append(f"{name} +{(at - previous) * 1000:.0f} ms")
+        previous = at
+    logger.info(f"Startup timing ({previous:.2f}s total): " + ", ".join(parts))
 
 def run_web_server():
-    logger.info(f"Starting Web Server on port {config.WEB_PORT}...")
+    global web_server
+    logger.info(f"Starting Web Server on port {config.WEB_PORT} ({config.WEB_SERVER})...")
     try:
-        from src.web.app import app
-        # Disable reloader to avoid main thread issues in frozen app
-        app.run(host='0.0.0.0', port=config.WEB_PORT, debug=False, use_reloader=False)
+        from src.web.app import app, create_web_server, prepare_serving
+        mark_phase("web app import")
+        if config.WEB_SERVER == 'dev':
+            prepare_serving()  # Warms up in the background while app.run binds the port
+            mark_phase("warm-up started")
+            # Disable reloader to avoid main thread issues in frozen app
+            app.run(host='0.0.0.0', port=config.WEB_PORT, debug=False, use_reloader=False)
+        else:
+            web_server = create_web_server(port=config.WEB_PORT)
+            mark_phase("listen")  # Warm-up runs in the background until /healthz is ready
+            web_server.serve_forever()
     except Exception as e:
         logger.error(f"Web Server Error: {e}")
 
 def run_telegram_bot():
     logger.info("Starting Telegram Bot...")
     try:
-        # Import main from bot
+        # Import main from bot (python-telegram-bot is only loaded here, after the panel is up)
+        start = time.perf_counter()
         from src.bot.main import main as bot_main
+        logger.info(f"Bot modules imported in {(time.perf_counter() - start) * 1000:.0f} ms")
         # We need to run this in a way that respects stop_event if possible,
         # but python-telegram-bot's polling is blocking. 
         # Since it's in a daemon thread, it will die when main process exits.
@@ -58,22 +85,28 @@ def get_chrome_path():
             return expanded
     return None
 
-def wait_for_server(port=config.WEB_PORT, timeout=30):
-    start_time = time.time()
-    while time.time() - start_time < timeout:
+def wait_for_server(port=config.WEB_PORT, timeout=30, interval=0.1):
+    """Poll /healthz until the web app reports its caches are warm."""
+    url = f"http://127.0.0.1:{port}/healthz"
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
         try:
-            import socket
-            with socket.create_connection(("localhost", port), timeout=1):
-                return True
-        except (socket.timeout, ConnectionRefusedError):
-            time.sleep(1)
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if json.load(response).get('ready'):
+                    return True
+        except (OSError, ValueError):
+            pass  # Not listening yet (URLError is an OSError) or 503 while warming up
+        time.sleep(interval)
     return False
 
-def launch_kiosk():
+def launch_kiosk(ready=None):
+    """Open the panel in Chrome. ready: result of a wait_for_server() the caller already did."""
     url = f"http://localhost:{config.WEB_PORT}"
-    logger.info("Waiting for Web Server to be ready...")
-    
-    if wait_for_server():
+    if ready is None:
+        logger.info("Waiting for Web Server to be ready...")
+        ready = wait_for_server()
+
+    if ready:
         logger.info(f"Server ready. Launching Chrome in Kiosk mode at {url}")
         chrome_exe = get_chrome_path()
         if chrome_exe:
@@ -104,6 +137,8 @@ def open_settings():
 def exit_app(icon, item):
     logger.info("Exiting application...")
     stop_event.set()
+    if web_server is not None:
+        web_server.stop(timeout=config.WEB_SHUTDOWN_TIMEOUT)
     icon.stop()
     # Force exit because flask/bot threads might linger
     os._exit(0)
@@ -119,17 +154,28 @@ if __name__ == "__main__":
     web_thread = threading.Thread(target=run_web_server, daemon=True)
     web_thread.start()
 
-    # Start Telegram Bot in a separate thread
-    # (Moved to thread because pystray needs main thread)
-    bot_thread = threading.Thread(target=run_telegram_bot, daemon=True)
-    bot_thread.start()
-
-    # Launch Chrome Kiosk initially
-    # Wait a bit for server
-    logger.info("Waiting for servers to start before launching kiosk...")
-    threading.Timer(5.0, launch_kiosk).start()
-
-    # System Tray Icon Setup
+    def start_kiosk_then_bot():
+        # Chrome opens as soon as /healthz says ready; the bot (and its heavy
+        # telegram import) starts afterwards so it does not slow the panel down
+        try:
+            ready = wait_for_server()
+            if ready:
+                mark_phase("ready (/healthz)")
+            launch_kiosk(ready)
+            mark_phase("kiosk launched")
+            log_startup_timing()
+        finally:
+            # Thread because pystray needs the main thread
+            bot_thread = threading.Thread(target=run_telegram_bot, daemon=True)
+            bot_thread.start()
+
+    logger.info("Waiting for the web server to be ready before launching kiosk...")
+    threading.Thread(target=start_kiosk_then_bot, daemon=True).start()
+
+    # System Tray Icon Setup (imported here so it does not delay the web server)
+    from PIL import Image
+    import pystray
+    from pystray import MenuItem as item
     try:
         image = Image.open("logo.ico")
     except:
@@ -1,6 +1,17 @@
-from src.web.app import app
+from src.web.app import app, create_web_server, prepare_serving
 import config
+import os
 
 if __name__ == '__main__':
-    print(f"Starting Web Server on port {config.WEB_PORT}...")
-    app.run(host='0.0.0.0', port=config.WEB_PORT, debug=True)
+    print(f"Starting Web Server on port {config.WEB_PORT} ({config.WEB_SERVER})...")
+    if config.WEB_SERVER == 'dev':
+        # The reloader parent only watches files; the serving child warms up and binds BUS_PORT
+        if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+            prepare_serving()
+        app.run(host='0.0.0.0', port=config.WEB_PORT, debug=True)
+    else:
+        server = create_web_server(port=config.WEB_PORT)
+        try:
+            server.serve_forever()
+        finally:
+            server.stop(timeout=config.WEB_SHUTDOWN_TIMEOUT)
@@ -0,0 +1,64 @@
+"""
+Concurrent update processing with per-user ordering.
+
+python-telegram-bot handles one update at a time by default, so one teacher's
+slow command holds up everyone else. PerUserUpdateProcessor lets the updates
+of different users run concurrently (up to max_concurrent_updates) while the
+updates of one user still run one after another, in arrival order, so the
+button/state machine in main.py never sees a user's messages out of order.
+"""
+import logging
+from collections import deque
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+logger = logging.getLogger(__name__)
+
+
+def user_key(update):
+    """Whose updates must stay ordered: the user, else the chat (None: no ordering)."""
+    if isinstance(update, Update):
+        if update.effective_user is not None:
+            return ('user', update.effective_user.id)
+        if update.effective_chat is not None:
+            return ('chat', update.effective_chat.id)
+    return None
+
+
+class PerUserUpdateProcessor(BaseUpdateProcessor):
+    __slots__ = ('_pending',)
+
+    def __init__(self, max_concurrent_updates):
+        super().__init__(max_concurrent_updates)
+        # key -> coroutines of that user, the first one is running
+        self._pending = {}
+
+    async def do_process_update(self, update, coroutine):
+        key = user_key(update)
+        if key is None:
+            await coroutine
+            return
+        queue = self._pending.get(key)
+        if queue is not None:
+            # The user's running update processes it next; this worker slot is freed
+            queue.append(coroutine)
+            return
+        queue = self._pending[key] = deque([coroutine])
+        try:
+            while queue:
+                try:
+                    await queue[0]
+                except Exception as e:
+                    logger.error(f"Update processing failed: {e}")
+                queue.popleft()
+        finally:
+            del self._pending[key]
+            for leftover in queue:  # Cancelled during shutdown
+                leftover.close()
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
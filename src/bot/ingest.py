@@ -0,0 +1,276 @@
+"""
+Media ingest pipeline for bot uploads.
+
+Uploads are downloaded into a staging folder, then a worker thread validates
+and normalizes them and atomically renames the result into the served folder,
+so the kiosk never sees a half-written file:
+
+    staging -> validate -> EXIF rotate + strip metadata + downscale -> publish
+
+Files that cannot be decoded are moved to the quarantine folder instead. The
+published file's media manifest entry (type, dimensions, duration, hash,
+uploader) is recorded just before it appears in the folder.
+Uploads already published to the same folder (same Telegram file_unique_id or
+same SHA-256 of the original bytes) are dropped, see UploadIndex.
+"""
+import errno
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image, ImageOps
+
+import config
+from src.common import thumbnails
+from src.common.media_manifest import describe_file, file_sha256, manifest
+
+logger = logging.getLogger(__name__)
+
+executor = ThreadPoolExecutor(max_workers=config.INGEST_WORKERS, thread_name_prefix="ingest")
+
+JPEG_QUALITY = 85
+
+
+class IngestError(Exception):
+    """The uploaded file could not be decoded and was quarantined."""
+
+
+class DuplicateUpload(Exception):
+    """The same file was already published to the target folder."""
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.name = name
+
+
+class UploadIndex:
+    """
+    Persisted map of Telegram file_unique_id / SHA-256 -> published file name,
+    kept per target folder. Entries whose file was deleted are ignored and pruned.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._data = None
+        self._pending = {}  # (folder, sha256) -> None, uploads still being processed
+
+    def _folder(self, target_dir):
+        if self._data is None:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self._data = json.load(f)
+            except FileNotFoundError:
+                self._data = {}
+            except (OSError, ValueError) as e:
+                logger.error(f"Upload index unreadable, starting empty: {e}")
+                self._data = {}
+        folder = self._data.setdefault(os.path.basename(target_dir), {})
+        folder.setdefault('unique_ids', {})
+        folder.setdefault('hashes', {})
+        return folder
+
+    def _save(self):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._data, f)
+        os.replace(tmp_path, self.path)
+
+    def _lookup(self, target_dir, field, key):
+        keys = self._folder(target_dir)[field]
+        name = keys.get(key)
+        if name and not os.path.exists(os.path.join(target_dir, name)):
+            del keys[key]  # Published file was deleted since
+            return None
+        return name
+
+    def find(self, target_dir, unique_id):
+        """Return the published name for a Telegram file_unique_id, or None."""
+        with self._lock:
+            return self._lookup(target_dir, 'unique_ids', unique_id)
+
+    def claim(self, target_dir, sha256, unique_id=None):
+        """
+        Check-and-reserve a content hash. Returns the existing name if the content
+        is already published (or being published), else None; the caller must then
+        record() or release() the hash.
+        """
+        pending_key = (os.path.basename(target_dir), sha256)
+        with self._lock:
+            if pending_key in self._pending:
+                return ''
+            name = self._lookup(target_dir, 'hashes', sha256)
+            if name is None:
+                self._pending[pending_key] = None
+            elif unique_id:
+                self._folder(target_dir)['unique_ids'][unique_id] = name
+                self._save()
+            return name
+
+    def release(self, target_dir, sha256):
+        with self._lock:
+            self._pending.pop((os.path.basename(target_dir), sha256), None)
+
+    def record(self, target_dir, name, sha256, unique_id=None):
+        with self._lock:
+            self._pending.pop((os.path.basename(target_dir), sha256), None)
+            folder = self._folder(target_dir)
+            folder['hashes'][sha256] = name
+            if unique_id:
+                folder['unique_ids'][unique_id] = name
+            self._save()
+
+
+upload_index = UploadIndex(config.UPLOAD_INDEX_FILE)
+
+
+def staging_path(ext):
+    os.makedirs(config.MEDIA_STAGING_DIR, exist_ok=True)
+    return os.path.join(config.MEDIA_STAGING_DIR, f"{uuid.uuid4()}{ext}")
+
+
+def discard(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def sniff_video(path):
+    """Return '.mp4' / '.webm' if the file starts like that container, else None."""
+    with open(path, 'rb') as f:
+        head = f.read(12)
+    if len(head) >= 8 and head[4:8] == b'ftyp':
+        return '.mp4'
+    if head[:4] == b'\x1a\x45\xdf\xa3':
+        return '.webm'
+    return None
+
+
+def normalize_image(src, out_base):
+    """
+    Decode, apply EXIF orientation, drop metadata and downscale to the panel size.
+    Returns the path of the normalized file.
+    """
+    with Image.open(src) as img:
+        img.verify()  # Catches truncated/corrupt files
+
+    with Image.open(src) as img:
+        if getattr(img, 'is_animated', False):
+            # Keep animated GIFs as-is, re-encoding would drop the frames
+            out_path = out_base + '.gif'
+            shutil.copyfile(src, out_path)
+            return out_path
+
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail((config.PANEL_WIDTH, config.PANEL_HEIGHT), Image.LANCZOS)
+
+        has_alpha = img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info)
+        if has_alpha:
+            out_path = out_base + '.png'
+            img.save(out_path, 'PNG', optimize=True)
+        else:
+            out_path = out_base + '.jpg'
+            img.convert('RGB').save(out_path, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+    return out_path
+
+
+def atomic_publish(src, target_dir, name):
+    """Move src into target_dir/name so that readers only ever see the complete file."""
+    os.makedirs(target_dir, exist_ok=True)
+    final_path = os.path.join(target_dir, name)
+    try:
+        os.replace(src, final_path)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        # Different drive: copy next to the target under a name the index ignores, then rename
+        part_path = os.path.join(target_dir, f".{name}.part")
+        try:
+            shutil.copyfile(src, part_path)
+            os.replace(part_path, final_path)
+        except BaseException:
+            discard(part_path)  # E.g. target drive full
+            raise
+        discard(src)
+    return final_path
+
+
+def quarantine(src, reason):
+    os.makedirs(config.MEDIA_QUARANTINE_DIR, exist_ok=True)
+    dest = os.path.join(config.MEDIA_QUARANTINE_DIR, os.path.basename(src))
+    try:
+        shutil.move(src, dest)
+    except OSError:
+        discard(src)
+    logger.warning(f"Quarantined upload {os.path.basename(src)}: {reason}")
+
+
+def ingest(staged_path, target_dir, kind, unique_id=None, uploader=None):
+    """
+    Process a downloaded upload (runs on the ingest executor).
+    kind is 'image' or 'video', uploader the Telegram user id. Returns the
+    published file name, raises DuplicateUpload if the same content is
+    already in target_dir.
+    """
+    sha256 = file_sha256(staged_path)
+    existing = upload_index.claim(target_dir, sha256, unique_id)
+    if existing is not None:
+        discard(staged_path)
+        raise DuplicateUpload(existing)
+    try:
+        name = _process(staged_path, target_dir, kind, uploader)
+    except BaseException:
+        upload_index.release(target_dir, sha256)
+        raise
+    upload_index.record(target_dir, name, sha256, unique_id)
+    return name
+
+
+def _process(staged_path, target_dir, kind, uploader):
+    file_id = str(uuid.uuid4())
+    out_base = os.path.join(config.MEDIA_STAGING_DIR, f"{file_id}.out")
+    published = False
+    try:
+        try:
+            if kind == 'video':
+                ext = sniff_video(staged_path)
+                if ext is None:
+                    raise IngestError("unknown video container")
+                ready_path = staged_path
+            else:
+                try:
+                    ready_path = normalize_image(staged_path, out_base)
+                except (OSError, SyntaxError, ValueError, Image.DecompressionBombError) as e:
+                    raise IngestError(f"image decode failed: {e}")
+                ext = os.path.splitext(ready_path)[1]
+        except IngestError as e:
+            quarantine(staged_path, e)
+            raise
+
+        name = f"{file_id}{ext}"
+        # Recorded first, so the web app finds the entry as soon as the file shows up
+        manifest.record(target_dir, name, describe_file(ready_path, uploaded_at=time.time(), uploader=uploader))
+        try:
+            final_path = atomic_publish(ready_path, target_dir, name)
+        except BaseException:
+            manifest.remove(target_dir, name)
+            raise
+        published = True
+    finally:
+        if not published:
+            # Any failure (disk full, manifest unwritable...): nothing may stay behind in
+            # staging. The download and a (partial) normalized copy are both ours.
+            discard(staged_path)
+            for out_ext in ('.gif', '.png', '.jpg'):
+                discard(out_base + out_ext)
+    if ready_path != staged_path:
+        discard(staged_path)
+    thumbnails.make_thumbnail(final_path)
+    logger.info(f"Published {name} to {target_dir}")
+    return name
@@ -1,14 +1,24 @@
 import os
+import asyncio
 import logging
-import uuid
 import sys
 import json
+import functools
+import threading
+import time
+from datetime import datetime
 from telegram import Update, ReplyKeyboardMarkup, KeyboardButton
 from telegram.ext import ApplicationBuilder, ContextTypes, CommandHandler, MessageHandler, filters
 
 # Import config from parent directory
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 import config
+from src.common import data_store
+from src.common import bus
+from src.common.schedule import get_compiled_schedule
+from src.bot import ingest
+from src.bot import webhook
+from src.bot.concurrency import PerUserUpdateProcessor
 
 # Logging Configuration
 logging.basicConfig(
@@ -17,56 +27,128 @@ logging.basicConfig(
 )
 
 # --- Data Helpers ---
+# data.json and allowed_users.json are touched from worker threads (asyncio.to_thread)
+# so a slow disk never stalls the event loop for the other users.
 
-def load_data():
-    """Load data.json"""
-    if not os.path.exists(config.DATA_FILE):
-        return {}
-    try:
-        with open(config.DATA_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except Exception as e:
-        logging.error(f"Error loading data.json: {e}")
-        return {}
+async def read_data():
+    """Shared data.json snapshot (read-only)"""
+    return await asyncio.to_thread(data_store.read_data)
 
-def save_data(data):
-    """Save data.json"""
-    try:
-        os.makedirs(os.path.dirname(config.DATA_FILE), exist_ok=True)
-        with open(config.DATA_FILE, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-        return True
-    except Exception as e:
-        logging.error(f"Error saving data.json: {e}")
-        return False
+def _update_and_publish(mutate, topic):
+    result = data_store.update_data(mutate)
+    bus.publish(topic)  # The kiosks show the change now, not on their next poll
+    return result
 
-def load_allowed_users():
-    if not os.path.exists(config.ALLOWED_USERS_FILE):
-        return []
+async def update_data(mutate, topic=bus.DATA):
+    """Atomic read-modify-write of data.json. Returns mutate's result, None on error."""
     try:
-        with open(config.ALLOWED_USERS_FILE, 'r') as f:
-            return json.load(f)
+        return await asyncio.to_thread(_update_and_publish, mutate, topic)
     except Exception as e:
-        logging.error(f"Error loading allowed users: {e}")
-        return []
+        logging.error(f"Error saving data.json: {e}")
+        return None
+
+async def replace_items(key, text):
+    """Replace a list (messages/quotes) with a single item. Returns the new count."""
+    def mutate(data):
+        data[key] = [text]
+        return len(data[key])
+    return await update_data(mutate, topic=key)
+
+async def append_item(key, text):
+    """Append to a list (messages/quotes). Returns the new count."""
+    def mutate(data):
+        if key not in data: data[key] = []
+        data[key].append(text)
+        return len(data[key])
+    return await update_data(mutate, topic=key)
+
+# --- Authorization ---
+
+class AllowedUsers:
+    """
+    In-memory set of authorized user ids, reloaded when allowed_users.json changes.
+    A watcher thread does the reloading (see watch), so a lookup on the event
+    loop is only a set lookup and never touches the disk.
+    """
+
+    def __init__(self, path, check_interval=1.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._users = frozenset()  # Replaced as a whole, so lookups need no lock
+        self._stamp = None
+        self._lock = threading.Lock()
+        self._watcher = None
+
+    def _file_stamp(self):
+        try:
+            st = os.stat(self.path)
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
 
-def save_allowed_user(user_id):
-    users = load_allowed_users()
-    if user_id not in users:
-        users.append(user_id)
-        with open(config.ALLOWED_USERS_FILE, 'w') as f:
-            json.dump(users, f)
+    def _load(self):
+        try:
+            with open(self.path, 'r') as f:
+                return frozenset(json.load(f))
+        except Exception as e:
+            logging.error(f"Error loading allowed users: {e}")
+            return self._users
+
+    def _reload_if_changed(self):
+        # Caller holds _lock
+        stamp = self._file_stamp()
+        if stamp != self._stamp:
+            self._users = self._load() if stamp else frozenset()
+            self._stamp = stamp
+
+    def refresh(self):
+        with self._lock:
+            self._reload_if_changed()
+
+    def watch(self):
+        """Load the file now and keep reloading it on a background thread (blocking)."""
+        self.refresh()
+        if self._watcher is None:
+            self._watcher = threading.Thread(target=self._watch, name="allowed-users", daemon=True)
+            self._watcher.start()
+
+    def _watch(self):
+        while True:
+            time.sleep(self.check_interval)
+            self.refresh()
+
+    def __contains__(self, user_id):
+        return user_id in self._users
+
+    def add(self, user_id):
+        """Persist a new user (blocking, call from a worker thread)."""
+        with self._lock:
+            self._reload_if_changed()
+            if user_id in self._users:
+                return
+            users = sorted(self._users | {user_id})
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(users, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+            self._users = frozenset(users)
+            self._stamp = self._file_stamp()
+
+allowed_users = AllowedUsers(config.ALLOWED_USERS_FILE)
+
+async def save_allowed_user(user_id):
+    await asyncio.to_thread(allowed_users.add, user_id)
 
 def is_authorized(user_id):
-    if user_id in config.ADMIN_IDS:
-        return True
-    allowed_users = load_allowed_users()
-    return user_id in allowed_users
+    return user_id in config.ADMIN_IDS or user_id in allowed_users
 
 def is_admin(user_id):
     return user_id in config.ADMIN_IDS
 
 # --- State Management ---
+# user id -> STATE_*; updates of one user are processed in order (see concurrency.py)
 user_states = {}
 
 # State Constants
@@ -77,6 +159,36 @@ STATE_WAITING_QUOTE = 3
 STATE_WAITING_QUOTE_ADD = 4
 STATE_WAITING_RIDDLE = 5
 
+# --- Handler Latency ---
+# name -> [calls, total seconds, max seconds]
+handler_stats = {}
+SLOW_HANDLER_SECONDS = 1.0
+
+def timed(handler):
+    """Wrap a handler so its latency is logged and collected in handler_stats."""
+    @functools.wraps(handler)
+    async def wrapper(update, context, *args):
+        start_time = time.perf_counter()
+        try:
+            return await handler(update, context, *args)
+        finally:
+            elapsed = time.perf_counter() - start_time
+            stats = handler_stats.setdefault(handler.__name__, [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += elapsed
+            stats[2] = max(stats[2], elapsed)
+            level = logging.WARNING if elapsed >= SLOW_HANDLER_SECONDS else logging.DEBUG
+            logging.log(level, f"{handler.__name__} took {elapsed * 1000:.1f} ms")
+    return wrapper
+
+def format_handler_stats():
+    if not handler_stats:
+        return "📭 Henüz ölçüm yok."
+    lines = ["⏱ **İşlem Süreleri** (adet / ort / en yüksek)"]
+    for name, (calls, total, worst) in sorted(handler_stats.items(), key=lambda item: -item[1][1]):
+        lines.append(f"`{name}`: {calls} / {total / calls * 1000:.0f} ms / {worst * 1000:.0f} ms")
+    return "\n".join(lines)
+
 # --- Keyboards ---
 
 def get_main_keyboard():
@@ -140,17 +252,10 @@ async def login_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     password = context.args[0]
     
-    current_password = config.BOT_ACCESS_CODE
-    try:
-        if os.path.exists(config.DATA_FILE):
-            with open(config.DATA_FILE, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                current_password = data.get('bot_access_code', config.BOT_ACCESS_CODE)
-    except Exception as e:
-        logging.error(f"Error reading data.json for password: {e}")
+    current_password = (await read_data()).get('bot_access_code', config.BOT_ACCESS_CODE)
 
     if password == current_password:
-        save_allowed_user(user_id)
+        await save_allowed_user(user_id)
         await context.bot.send_message(
             chat_id=update.effective_chat.id, 
             text="✅ Giriş başarılı! Artık butonları kullanabilirsiniz.",
@@ -178,9 +283,7 @@ async def mesaj_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
     
     new_message = ' '.join(context.args)
-    data = load_data()
-    data['messages'] = [new_message]
-    if save_data(data):
+    if await replace_items('messages', new_message):
         await context.bot.send_message(chat_id=update.effective_chat.id, text=f"✅ Kayan yazı güncellendi:\n📢 _{new_message}_", parse_mode='Markdown')
     else:
         await context.bot.send_message(chat_id=update.effective_chat.id, text="❌ Hata.")
@@ -190,16 +293,14 @@ async def mesaj_ekle_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
     if not is_authorized(user_id): return
     if not context.args: return
     new_message = ' '.join(context.args)
-    data = load_data()
-    if 'messages' not in data: data['messages'] = []
-    data['messages'].append(new_message)
-    if save_data(data):
-        await context.bot.send_message(chat_id=update.effective_chat.id, text=f"✅ Eklendi. Toplam: {len(data['messages'])}")
+    count = await append_item('messages', new_message)
+    if count:
+        await context.bot.send_message(chat_id=update.effective_chat.id, text=f"✅ Eklendi. Toplam: {count}")
 
 async def mesajlar_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
     if not is_authorized(user_id): return
-    data = load_data()
+    data = await read_data()
     messages = data.get('messages', [])
     if not messages:
         await context.bot.send_message(chat_id=update.effective_chat.id, text="📭 Mesaj yok.")
@@ -216,9 +317,7 @@ async def soz_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not is_authorized(user_id): return
     if not context.args: return
     new_quote = ' '.join(context.args)
-    data = load_data()
-    data['quotes'] = [new_quote]
-    save_data(data)
+    await replace_items('quotes', new_quote)
     await context.bot.send_message(chat_id=update.effective_chat.id, text=f"✅ Günün sözü: {new_quote}")
 
 async def sozekle_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -226,16 +325,13 @@ async def sozekle_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not is_authorized(user_id): return
     if not context.args: return
     new_quote = ' '.join(context.args)
-    data = load_data()
-    if 'quotes' not in data: data['quotes'] = []
-    data['quotes'].append(new_quote)
-    save_data(data)
-    await context.bot.send_message(chat_id=update.effective_chat.id, text=f"✅ Söz eklendi. Toplam: {len(data['quotes'])}")
+    count = await append_item('quotes', new_quote)
+    await context.bot.send_message(chat_id=update.effective_chat.id, text=f"✅ Söz eklendi. Toplam: {count}")
 
 async def sozler_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
     if not is_authorized(user_id): return
-    data = load_data()
+    data = await read_data()
     quotes = data.get('quotes', [])
     text = "📢 **Sözler:**\n" + "\n".join([f"{i+1}. {q}" for i, q in enumerate(quotes)]) if quotes else "📭 Söz yok."
     await context.bot.send_message(chat_id=update.effective_chat.id, text=text, parse_mode='Markdown')
@@ -246,12 +342,21 @@ async def sozsil_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def durum_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
     if not is_authorized(user_id): return
-    data = load_data()
-    text = f"🏫 Okul: {data.get('school_name', '-')}\n📢 Kayan Yazı: {len(data.get('messages', []))}\n💬 Sözler: {len(data.get('quotes', []))}"
+    data = await read_data()
+    slot = await asyncio.to_thread(lambda: get_compiled_schedule().at_time(datetime.now()).slot)
+    text = f"🏫 Okul: {data.get('school_name', '-')}\n🔔 Şu an: {slot.name if slot else 'Ders Dışı'}\n📢 Kayan Yazı: {len(data.get('messages', []))}\n💬 Sözler: {len(data.get('quotes', []))}"
     await context.bot.send_message(chat_id=update.effective_chat.id, text=text)
 
+async def sure_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Admin only: per-handler latency since the bot started"""
+    if not is_admin(update.effective_user.id): return
+    await context.bot.send_message(chat_id=update.effective_chat.id, text=format_handler_stats(), parse_mode='Markdown')
+
 # --- Media Upload ---
 
+DUPLICATE_MSG = "ℹ️ Bu dosya zaten yüklü, tekrar eklenmedi."
+RECEIVED_MSG = "⏳ Dosya alındı, yükleniyor..."
+
 async def handle_document(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
     if not is_authorized(user_id):
@@ -268,31 +373,69 @@ async def handle_document(update: Update, context: ContextTypes.DEFAULT_TYPE):
         if not os.path.exists(config.RIDDLES_DIR):
             os.makedirs(config.RIDDLES_DIR, exist_ok=True)
     
-    file = None
-    file_name = f"{uuid.uuid4()}"
+    media = None
+    kind = 'image'
+    ext = ".jpg"
     
     if update.message.photo:
-        file = await update.message.photo[-1].get_file()
-        file_name += ".jpg"
+        media = update.message.photo[-1]
     elif update.message.video:
-        file = await update.message.video.get_file()
-        file_name += ".mp4"
+        media = update.message.video
+        kind, ext = 'video', ".mp4"
     elif update.message.document:
         mime = update.message.document.mime_type
         if mime and mime.startswith('image/'):
-            file_name += ".jpg"
+            pass
         elif mime and mime.startswith('video/'):
-            file_name += ".mp4"
+            kind, ext = 'video', ".mp4"
         else:
             await context.bot.send_message(chat_id=update.effective_chat.id, text="❌ Sadece fotoğraf/video.")
             return
-        file = await update.message.document.get_file()
+        media = update.message.document
     else:
         return
 
-    file_path = os.path.join(target_dir, file_name)
-    await file.download_to_drive(file_path)
-    await context.bot.send_message(chat_id=update.effective_chat.id, text=success_msg)
+    # Same Telegram file already published here: skip the download entirely
+    unique_id = media.file_unique_id
+    if await asyncio.to_thread(ingest.upload_index.find, target_dir, unique_id):
+        await context.bot.send_message(chat_id=update.effective_chat.id, text=DUPLICATE_MSG)
+        return
+
+    # Acknowledge now; the download runs in the background so a large video does
+    # not hold up this user's next button press (or anyone else's updates)
+    await context.bot.send_message(chat_id=update.effective_chat.id, text=RECEIVED_MSG)
+    context.application.create_task(
+        timed(publish_upload)(update, context, media, target_dir, kind, ext, unique_id, success_msg),
+        update=update,
+    )
+
+async def publish_upload(update, context, media, target_dir, kind, ext, unique_id, success_msg):
+    """Background part of handle_document: download into staging, ingest, publish."""
+    chat_id = update.effective_chat.id
+    async with context.bot_data['download_slots']:
+        file = await media.get_file()
+        staged_path = ingest.staging_path(ext)
+        try:
+            await file.download_to_drive(staged_path)
+        except Exception:
+            ingest.discard(staged_path)
+            await context.bot.send_message(chat_id=chat_id, text="❌ Dosya indirilemedi, lütfen tekrar gönderin.")
+            raise
+
+    # The worker pool validates/normalizes and publishes atomically
+    loop = asyncio.get_running_loop()
+    try:
+        name = await loop.run_in_executor(ingest.executor, ingest.ingest, staged_path, target_dir, kind,
+                                          unique_id, update.effective_user.id)
+    except ingest.DuplicateUpload:
+        await context.bot.send_message(chat_id=chat_id, text=DUPLICATE_MSG)
+        return
+    except ingest.IngestError:
+        await context.bot.send_message(chat_id=chat_id, text="❌ Dosya açılamadı, yüklenmedi. Lütfen başka bir dosya deneyin.")
+        return
+    topic = bus.RIDDLES if target_dir == config.RIDDLES_DIR else bus.SLIDES
+    await asyncio.to_thread(bus.publish, topic, name=name)
+    await context.bot.send_message(chat_id=chat_id, text=success_msg)
 
 # --- Text Handler (Interactive State Machine) ---
 
@@ -315,9 +458,7 @@ async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     if current_state == STATE_WAITING_MARQUEE:
         # Process New Marquee Message
-        data = load_data()
-        data['messages'] = [text]
-        if save_data(data):
+        if await replace_items('messages', text):
             await context.bot.send_message(chat_id=update.effective_chat.id, text=f"✅ Kayan yazı değiştirildi:\n📢 {text}", reply_markup=get_main_keyboard())
         else:
             await context.bot.send_message(chat_id=update.effective_chat.id, text="❌ Hata oluştu.", reply_markup=get_main_keyboard())
@@ -325,27 +466,19 @@ async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
 
     elif current_state == STATE_WAITING_MARQUEE_ADD:
-        data = load_data()
-        if 'messages' not in data: data['messages'] = []
-        data['messages'].append(text)
-        if save_data(data):
+        if await append_item('messages', text):
             await context.bot.send_message(chat_id=update.effective_chat.id, text=f"✅ Kayan yazıya eklendi.\n📢 {text}", reply_markup=get_main_keyboard())
         user_states[user_id] = STATE_NONE
         return
 
     elif current_state == STATE_WAITING_QUOTE:
-        data = load_data()
-        data['quotes'] = [text]
-        save_data(data)
+        await replace_items('quotes', text)
         await context.bot.send_message(chat_id=update.effective_chat.id, text=f"✅ Günün sözü değiştirildi:\n💬 {text}", reply_markup=get_main_keyboard())
         user_states[user_id] = STATE_NONE
         return
 
     elif current_state == STATE_WAITING_QUOTE_ADD:
-        data = load_data()
-        if 'quotes' not in data: data['quotes'] = []
-        data['quotes'].append(text)
-        save_data(data)
+        await append_item('quotes', text)
         await context.bot.send_message(chat_id=update.effective_chat.id, text=f"✅ Söz eklendi:\n💬 {text}", reply_markup=get_main_keyboard())
         user_states[user_id] = STATE_NONE
         return
@@ -408,6 +541,10 @@ async def post_init(application):
         ("id", "Telegram ID'nizi göster")
     ]
     await application.bot.set_my_commands(commands)
+    await asyncio.to_thread(allowed_users.watch)
+    # Background downloads running at once (see publish_upload); created here so
+    # it belongs to the running event loop
+    application.bot_data['download_slots'] = asyncio.Semaphore(config.BOT_DOWNLOADS)
 
 # --- Main ---
 
@@ -417,10 +554,13 @@ def main():
         return
         
     builder = ApplicationBuilder().token(config.BOT_TOKEN).post_init(post_init)
+    builder.concurrent_updates(PerUserUpdateProcessor(config.BOT_CONCURRENT_UPDATES))
     
     # Custom Network Configuration
     if config.BOT_API_URL:
         builder.base_url(config.BOT_API_URL)
+    if config.BOT_API_FILE_URL:
+        builder.base_file_url(config.BOT_API_FILE_URL)
 
     # SSL Verification Handling
     if not config.BOT_SSL_VERIFY:
@@ -439,24 +579,31 @@ def main():
     application = builder.build()
     
     # Command Handlers
-    application.add_handler(CommandHandler('start', start))
-    application.add_handler(CommandHandler('giris', login_command))
-    application.add_handler(CommandHandler('id', id_command))
-    application.add_handler(CommandHandler('mesaj', mesaj_command))
-    application.add_handler(CommandHandler('mesajekle', mesaj_ekle_command))
-    application.add_handler(CommandHandler('mesajlar', mesajlar_command))
-    application.add_handler(CommandHandler('mesajsil', mesaj_sil_command))
-    application.add_handler(CommandHandler('soz', soz_command))
-    application.add_handler(CommandHandler('sozekle', sozekle_command))
-    application.add_handler(CommandHandler('sozler', sozler_command))
-    application.add_handler(CommandHandler('sozsil', sozsil_command))
-    application.add_handler(CommandHandler('durum', durum_command))
+    application.add_handler(CommandHandler('start', timed(start)))
+    application.add_handler(CommandHandler('giris', timed(login_command)))
+    application.add_handler(CommandHandler('id', timed(id_command)))
+    application.add_handler(CommandHandler('mesaj', timed(mesaj_command)))
+    application.add_handler(CommandHandler('mesajekle', timed(mesaj_ekle_command)))
+    application.add_handler(CommandHandler('mesajlar', timed(mesajlar_command)))
+    application.add_handler(CommandHandler('mesajsil', timed(mesaj_sil_command)))
+    application.add_handler(CommandHandler('soz', timed(soz_command)))
+    application.add_handler(CommandHandler('sozekle', timed(sozekle_command)))
+    application.add_handler(CommandHandler('sozler', timed(sozler_command)))
+    application.add_handler(CommandHandler('sozsil', timed(sozsil_command)))
+    application.add_handler(CommandHandler('durum', timed(durum_command)))
+    application.add_handler(CommandHandler('sure', timed(sure_command)))
     
     # Media & Text Handlers
-    application.add_handler(MessageHandler(filters.PHOTO | filters.VIDEO | filters.Document.IMAGE | filters.Document.VIDEO, handle_document))
-    application.add_handler(MessageHandler(filters.TEXT & (~filters.COMMAND), handle_text))
+    application.add_handler(MessageHandler(filters.PHOTO | filters.VIDEO | filters.Document.IMAGE | filters.Document.VIDEO, timed(handle_document)))
+    application.add_handler(MessageHandler(filters.TEXT & (~filters.COMMAND), timed(handle_text)))
     
     print(f"Bot çalışıyor (Admin IDs: {config.ADMIN_IDS})...")
+    if config.BOT_MODE == 'webhook':
+        if config.BOT_WEBHOOK_URL:
+            # post_init is only called by run_polling / run_webhook, so pass it along
+            webhook.run(application, post_init)
+            return
+        logging.error("BOT_MODE=webhook but BOT_WEBHOOK_URL is empty, falling back to polling")
     application.run_polling()
 
 if __name__ == '__main__':
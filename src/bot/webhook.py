@@ -0,0 +1,143 @@
+"""
+Webhook mode for the bot (BOT_MODE=webhook).
+
+Instead of long-polling getUpdates, the Bot API pushes every update as a POST to
+BOT_WEBHOOK_URL. A small asyncio HTTP listener in the bot's own event loop
+receives them, checks the X-Telegram-Bot-Api-Secret-Token header and puts the
+update on application.update_queue, where the handlers pick it up exactly as in
+polling mode. The listener answers 200 right away; handling runs after that.
+
+Only what the Bot API sends is understood: POST with a Content-Length JSON body,
+keep-alive connections. Put a TLS-terminating reverse proxy (or a local Bot API
+server) in front of it when Telegram has to reach it from the internet.
+"""
+import asyncio
+import hmac
+import json
+import logging
+import secrets
+from urllib.parse import urlsplit
+
+from telegram import Update
+
+import config
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = 'x-telegram-bot-api-secret-token'
+# Telegram updates are a few KB; anything this large is not one
+MAX_BODY = 1024 * 1024
+# Idle keep-alive connections are dropped after this long
+IDLE_TIMEOUT = 75  # seconds
+
+REASONS = {200: 'OK', 400: 'Bad Request', 403: 'Forbidden', 404: 'Not Found',
+           405: 'Method Not Allowed', 413: 'Payload Too Large'}
+
+
+def webhook_path(url):
+    """Path part of the public webhook URL, which is also what the listener serves."""
+    return urlsplit(url).path or '/'
+
+
+class WebhookListener:
+    def __init__(self, application, path, secret_token):
+        self.application = application
+        self.path = path
+        self.secret_token = secret_token
+        self._server = None
+
+    async def start(self, host, port):
+        self._server = await asyncio.start_server(self._serve, host, port)
+        logger.info(f"Webhook listener on {host}:{port}{self.path}")
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _serve(self, reader, writer):
+        try:
+            while True:
+                request_line = await asyncio.wait_for(reader.readline(), IDLE_TIMEOUT)
+                if not request_line.strip():
+                    break
+                method, target, _ = request_line.decode('latin-1').split(' ', 2)
+                headers = {}
+                while True:
+                    line = await asyncio.wait_for(reader.readline(), IDLE_TIMEOUT)
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get('content-length') or 0)
+                if length > MAX_BODY:
+                    await self._respond(writer, 413, keep_alive=False)
+                    break
+                body = await asyncio.wait_for(reader.readexactly(length), IDLE_TIMEOUT) if length else b''
+
+                status = await self._dispatch(method, target, headers, body)
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                await self._respond(writer, status, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, method, target, headers, body):
+        if urlsplit(target).path != self.path:
+            return 404
+        if method != 'POST':
+            return 405
+        token = headers.get(SECRET_HEADER, '')
+        if not hmac.compare_digest(token.encode('latin-1'), self.secret_token.encode('latin-1')):
+            logger.warning("Webhook request with a wrong secret token rejected")
+            return 403
+        try:
+            update = Update.de_json(json.loads(body), self.application.bot)
+        except (ValueError, TypeError, KeyError) as e:
+            logger.warning(f"Webhook request with an invalid update: {e}")
+            return 400
+        await self.application.update_queue.put(update)
+        return 200
+
+    @staticmethod
+    async def _respond(writer, status, keep_alive):
+        connection = 'keep-alive' if keep_alive else 'close'
+        writer.write(f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                     f"Content-Length: 0\r\nConnection: {connection}\r\n\r\n".encode('latin-1'))
+        await writer.drain()
+
+
+async def serve(application, post_init=None):
+    """Run the application on webhook updates until cancelled."""
+    # Without a configured secret a fresh one is registered on every start
+    secret_token = config.BOT_WEBHOOK_SECRET or secrets.token_urlsafe(32)
+    listener = WebhookListener(application, webhook_path(config.BOT_WEBHOOK_URL), secret_token)
+    async with application:  # initialize() / shutdown()
+        if post_init is not None:
+            await post_init(application)
+        await application.start()
+        await listener.start(config.BOT_WEBHOOK_LISTEN, config.BOT_WEBHOOK_PORT)
+        try:
+            await application.bot.set_webhook(
+                url=config.BOT_WEBHOOK_URL,
+                secret_token=secret_token,
+                allowed_updates=Update.ALL_TYPES,
+            )
+            logger.info(f"Webhook registered: {config.BOT_WEBHOOK_URL}")
+            await asyncio.Event().wait()
+        finally:
+            await listener.stop()
+            await application.stop()
+
+
+def run(application, post_init=None):
+    """Blocking entry point, the webhook counterpart of application.run_polling()."""
+    try:
+        asyncio.run(serve(application, post_init))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,140 @@
+"""
+Birthday index and Excel/CSV import.
+
+data['birthdays'] is a list of {"name", "date"} with date "DD.MM" (older entries
+may carry a year: "DD.MM.YYYY"). BirthdayIndex groups the names by "DD.MM" once
+per data version, so "today" is a dict lookup and "next N days" is N lookups.
+"""
+import calendar
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+from src.common import data_store
+from src.common.spreadsheet import find_header, iter_rows
+
+
+def day_key(date_str):
+    """'5.3', '05/03', '05.03.2010', '2010-03-05' -> '05.03'; None if not a valid day."""
+    parts = str(date_str).strip().split()[0:1] or ['']
+    parts = parts[0].replace('/', '.').replace('-', '.').split('.')
+    if len(parts) >= 3 and len(parts[0]) == 4:
+        parts = [parts[2], parts[1]]  # ISO year-month-day
+    if len(parts) < 2 or not parts[0].isdigit() or not parts[1].isdigit():
+        return None
+    day, month = int(parts[0]), int(parts[1])
+    if not (1 <= month <= 12 and 1 <= day <= calendar.monthrange(2000, month)[1]):
+        return None
+    return f"{day:02d}.{month:02d}"
+
+
+def entry_key(name, date_str):
+    """Identity used for duplicate detection."""
+    return (str(name).strip(), day_key(date_str) or str(date_str).strip())
+
+
+class BirthdayIndex:
+    def __init__(self, birthdays):
+        self._by_day = defaultdict(list)
+        for b in birthdays or []:
+            key = day_key(b.get('date', ''))
+            if key and b.get('name'):
+                self._by_day[key].append(b['name'])
+
+    def __len__(self):
+        return sum(len(names) for names in self._by_day.values())
+
+    def on(self, day):
+        """Names with a birthday on `day` (date/datetime). Feb 29 is shown on Feb 28 in non-leap years."""
+        names = self._by_day.get(day.strftime("%d.%m"), [])
+        if day.month == 2 and day.day == 28 and not calendar.isleap(day.year):
+            names = names + self._by_day.get("29.02", [])
+        return list(names)
+
+    def upcoming(self, start, days):
+        """[(date, names), ...] for the `days` days from `start` (inclusive) that have birthdays."""
+        result = []
+        for offset in range(days):
+            day = start + timedelta(days=offset)
+            names = self.on(day)
+            if names:
+                result.append((day, names))
+        return result
+
+
+# --- Import ---
+
+NAME_WORDS = {'ad', 'adı', 'adi', 'isim', 'ismi'}
+SURNAME_WORDS = {'soyad', 'soyadı', 'soyadi'}
+DATE_WORDS = {'doğum', 'dogum'}
+# e-Okul exports also list the parents' names
+PARENT_WORDS = {'baba', 'anne', 'veli'}
+
+
+def _match_header(cells):
+    columns = {'full': None, 'name': None, 'surname': None, 'date': None}
+    for i, words in enumerate(cells):
+        if PARENT_WORDS.intersection(words):
+            continue
+        has_name = bool(NAME_WORDS.intersection(words))
+        has_surname = bool(SURNAME_WORDS.intersection(words))
+        if has_name and has_surname:
+            columns['full'] = i if columns['full'] is None else columns['full']
+        elif has_surname:
+            columns['surname'] = i if columns['surname'] is None else columns['surname']
+        elif has_name:
+            columns['name'] = i if columns['name'] is None else columns['name']
+        if DATE_WORDS.intersection(words) and columns['date'] is None:
+            columns['date'] = i
+    if columns['date'] is None or (columns['full'] is None and columns['name'] is None):
+        return None
+    return columns
+
+
+def _cell(row, index):
+    if index is None or index >= len(row) or row[index] is None:
+        return ''
+    return str(row[index]).strip()
+
+
+def parse_birth_date(value):
+    """Cell value (date, Excel serial number or text) -> 'DD.MM' or None."""
+    if isinstance(value, (datetime, date)):
+        return value.strftime("%d.%m")
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        from openpyxl.utils.datetime import from_excel
+        try:
+            return from_excel(value).strftime("%d.%m")
+        except (ValueError, OverflowError, AttributeError):
+            return None
+    return day_key(value) if value else None
+
+
+def read_birthdays(stream, filename):
+    """
+    Stream an e-Okul style export. Yields (row_number, name, 'DD.MM', error)
+    per data row; error is None for good rows. Empty rows are skipped.
+    Raises SpreadsheetError if the file or its header row cannot be read.
+    """
+    rows = iter_rows(stream, filename)
+    columns, row_number = find_header(rows, _match_header, expected="Adı Soyadı, Doğum Tarihi")
+    for row_number, row in enumerate(rows, start=row_number + 1):
+        if not any(cell not in (None, '') for cell in row):
+            continue
+        if columns['full'] is not None:
+            name = _cell(row, columns['full'])
+        else:
+            name = f"{_cell(row, columns['name'])} {_cell(row, columns['surname'])}".strip()
+        raw_date = row[columns['date']] if columns['date'] < len(row) else None
+        if not name:
+            yield row_number, None, None, "ad boş"
+            continue
+        date_key = parse_birth_date(raw_date)
+        if date_key is None:
+            yield row_number, name, None, f"tarih okunamadı ({raw_date!s})"
+            continue
+        yield row_number, name, date_key, None
+
+
+def get_birthday_index():
+    """BirthdayIndex for the current data.json, rebuilt only when the data changes."""
+    return data_store.store.derived('birthdays', lambda data: BirthdayIndex(data.get('birthdays', [])))
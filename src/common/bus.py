@@ -0,0 +1,126 @@
+"""
+Change notifications between the bot and the web app.
+
+publish() calls the subscribers registered in this process right away. When
+the bot and the web app run as separate processes (run_bot.py / run_web.py),
+the web process listen()s on a UDP port on 127.0.0.1 and the bot's events are
+sent there as small JSON datagrams. Under launcher.py both sides share one
+process and one bus, so nothing goes over the socket.
+
+Delivery is best effort: the web app still notices changes by itself (data.json
+mtime, folder mtime), the bus only makes it immediate.
+"""
+import json
+import logging
+import socket
+import threading
+from collections import namedtuple
+
+import config
+
+logger = logging.getLogger(__name__)
+
+# Topics
+MESSAGES = 'messages'  # Marquee text
+QUOTES = 'quotes'
+DATA = 'data'          # Any other data.json change
+SLIDES = 'slides'      # File added to / removed from the slideshow folder
+RIDDLES = 'riddles'
+
+Event = namedtuple('Event', ['topic', 'detail'])
+
+MAX_DATAGRAM = 8192
+
+
+class ChangeBus:
+    def __init__(self, port):
+        self.port = port
+        self._subscribers = []
+        self._socket = None
+        self._lock = threading.Lock()
+
+    @property
+    def listening(self):
+        return self._socket is not None
+
+    def subscribe(self, callback):
+        """callback(event) runs on the publishing (or the listener) thread, keep it short."""
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def publish(self, topic, **detail):
+        event = Event(topic, detail)
+        self._deliver(event)
+        # A listener in this process already got it above
+        if not self.listening and self.port:
+            self._send(event)
+
+    def _deliver(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(event)
+            except Exception as e:
+                logger.error(f"Change bus subscriber failed on '{event.topic}': {e}")
+
+    def _send(self, event):
+        payload = json.dumps({'topic': event.topic, 'detail': event.detail}, ensure_ascii=False).encode('utf-8')
+        try:
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+                sock.sendto(payload, ('127.0.0.1', self.port))
+        except OSError as e:
+            logger.debug(f"Change bus send failed: {e}")
+
+    def listen(self):
+        """Receive events from other processes. Returns False if the port is unavailable."""
+        if self.listening or not self.port:
+            return self.listening
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            sock.bind(('127.0.0.1', self.port))
+        except OSError as e:
+            sock.close()
+            logger.warning(f"Change bus cannot listen on 127.0.0.1:{self.port}: {e}")
+            return False
+        self._socket = sock
+        threading.Thread(target=self._receive, args=(sock,), name="ChangeBus", daemon=True).start()
+        logger.info(f"Change bus listening on 127.0.0.1:{self.port}")
+        return True
+
+    def _receive(self, sock):
+        while True:
+            try:
+                payload, _ = sock.recvfrom(MAX_DATAGRAM)
+            except OSError:
+                return  # Socket closed
+            try:
+                message = json.loads(payload)
+                event = Event(str(message['topic']), dict(message.get('detail') or {}))
+            except (ValueError, KeyError, TypeError):
+                continue
+            self._deliver(event)
+
+    def close(self):
+        sock, self._socket = self._socket, None
+        if sock is not None:
+            sock.close()
+
+
+change_bus = ChangeBus(config.BUS_PORT)
+
+
+def publish(topic, **detail):
+    change_bus.publish(topic, **detail)
+
+
+def subscribe(callback):
+    change_bus.subscribe(callback)
+
+
+def listen():
+    return change_bus.listen()
+
+
+def close():
+    change_bus.close()
@@ -0,0 +1,337 @@
+"""
+Shared data.json store for the web app and the Telegram bot.
+
+Keeps a single parsed + merged snapshot in memory and only re-reads the file
+when its mtime/size changes (or after a write from this process).
+
+Writes go through update(): an inter-process file lock is taken, the file is
+re-read, the change is applied and the result is written to a temp file that is
+fsync'ed and renamed over data.json. Every write bumps "data_version".
+
+With STORAGE_ENGINE=sqlite the same interface is backed by SqliteStore
+(src/common/sqlite_store.py) instead.
+"""
+import copy
+import json
+import logging
+import os
+import threading
+import time
+
+import config
+
+if os.name == 'nt':
+    import msvcrt
+else:
+    import fcntl
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DATA = {
+    "duty_roster": [],
+    "class_schedules": [],
+    "birthdays": [],
+    "messages": ["Akıllı Okul Panosu Sistemine Hoşgeldiniz"],
+    "quotes": ["Kitap okumayı unutmayın."],
+    "school_name": "OKUL ADI",
+    "logo_url": "",
+    "slideshow": {
+        "duration": 5000,
+        "transition": "fade",
+        "order": "newest",
+        "fit_mode": "contain"
+    },
+    "performance_mode": "high",
+    "countdown": {
+        "label": "Geri Sayım",
+        "target_date": ""
+    },
+    "layout": [
+        {"id": "card-status", "title": "Durum", "visible": True, "type": "status"},
+        {"id": "card-duty", "title": "Nöbetçi Öğretmenler", "visible": True, "type": "duty"},
+        {"id": "card-quote", "title": "Günün Sözü", "visible": True, "type": "quote"},
+        {"id": "card-countdown", "title": "Geri Sayım", "visible": True, "type": "countdown"},
+        {"id": "card-birthdays", "title": "Doğum Günleri", "visible": True, "type": "birthdays"},
+        {"id": "card-classes", "title": "Sınıf Durumları", "visible": True, "type": "classes"},
+        {"id": "card-riddle", "title": "Bilmece/Soru", "visible": True, "type": "riddle"}
+    ],
+    "schedule": [],
+    "marquee": {
+        "font_size": "1.2",
+        "duration": "30",
+        "color": "#2c3e50",
+        "font_family": "inherit"
+    }
+}
+
+
+def copy_json(value):
+    """deepcopy() for parsed JSON (dicts, lists, scalars), without deepcopy's memo bookkeeping."""
+    kind = type(value)
+    if kind is dict:
+        return {k: copy_json(v) for k, v in value.items()}
+    if kind is list:
+        return [copy_json(v) for v in value]
+    if kind in (str, int, float, bool) or value is None:
+        return value
+    return copy.deepcopy(value)
+
+
+def merge_with_defaults(loaded):
+    """Merge a raw data.json document over DEFAULT_DATA."""
+    data = copy.deepcopy(DEFAULT_DATA)
+    # Simple merge for top-level keys
+    for k, v in loaded.items():
+        if isinstance(v, dict) and k in data and isinstance(data[k], dict):
+            data[k].update(v)
+        else:
+            data[k] = v
+
+    # Migration: Ensure new cards exist in layout
+    existing_ids = [item.get('id') for item in data.get('layout', [])]
+    if 'card-riddle' not in existing_ids:
+        data['layout'].append({"id": "card-riddle", "title": "Bilmece/Soru", "visible": True, "type": "riddle"})
+
+    return data
+
+
+class DataStoreError(Exception):
+    """data.json could not be read, so it is not safe to write it."""
+
+
+class FileLock:
+    """Exclusive lock shared by all processes (web, bot, launcher) using the same data file."""
+
+    def __init__(self, path):
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._fh = None
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        self._depth += 1
+        if self._depth == 1:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._fh = open(self.path, 'a+')
+            if os.name == 'nt':
+                self._fh.seek(0)
+                while True:
+                    try:
+                        msvcrt.locking(self._fh.fileno(), msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        # LK_LOCK gives up after ~10s, keep waiting
+                        continue
+            else:
+                fcntl.flock(self._fh.fileno(), fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        self._depth -= 1
+        if self._depth == 0:
+            try:
+                if os.name == 'nt':
+                    self._fh.seek(0)
+                    msvcrt.locking(self._fh.fileno(), msvcrt.LK_UNLCK, 1)
+                else:
+                    fcntl.flock(self._fh.fileno(), fcntl.LOCK_UN)
+            finally:
+                self._fh.close()
+                self._fh = None
+        self._thread_lock.release()
+
+
+class SnapshotStore:
+    """
+    What both storage engines share: read() returns one in-memory snapshot that is
+    replaced (never modified) on change, so copies and derived indexes can key on it.
+    """
+
+    def __init__(self):
+        self._derived = {}
+
+    def read(self):
+        raise NotImplementedError
+
+    def derived(self, key, builder):
+        """
+        Return builder(snapshot), computed once per data version.
+        Used for indexes that are expensive to build but only change with data.json.
+        """
+        data = self.read()
+        entry = self._derived.get(key)
+        if entry is not None and entry[0] is data:
+            return entry[1]
+        value = builder(data)
+        self._derived[key] = (data, value)
+        return value
+
+
+class DataStore(SnapshotStore):
+    """
+    In-memory snapshot of data.json with mtime/size change detection.
+
+    read() returns the shared snapshot and must be treated as read-only.
+    Changes go through update(mutate), which is atomic across threads and processes.
+    """
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self.version = 0
+        self._lock = threading.Lock()
+        self._file_lock = FileLock(path + '.lock')
+        self._data = None
+        self._stamp = None
+
+    def _file_stamp(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _read_file(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _set_snapshot(self, data, stamp):
+        self._data = data
+        self._stamp = stamp
+        self.version = data.get('data_version', 0)
+
+    def _reload(self, stamp):
+        loaded = {}
+        if stamp is not None:
+            try:
+                loaded = self._read_file()
+            except Exception as e:
+                logger.error(f"Error loading data.json: {e}")
+                if self._data is not None:
+                    # Keep the last good snapshot, retry on the next read
+                    return
+        self._set_snapshot(merge_with_defaults(loaded), stamp)
+
+    def read(self):
+        """Return the current snapshot (shared, do not mutate)."""
+        stamp = self._file_stamp()
+        data = self._data
+        if data is not None and stamp == self._stamp:
+            return data
+        with self._lock:
+            if self._data is None or stamp != self._stamp:
+                self._reload(stamp)
+            return self._data
+
+    @property
+    def etag(self):
+        """Stable (cross-process) identifier of the current snapshot."""
+        self.read()
+        stamp = self._stamp
+        if stamp is None:
+            return "0"
+        return f"{self.version}-{stamp[0]:x}-{stamp[1]:x}"
+
+    def _parse_for_write(self, stamp):
+        # Caller holds the file lock. A file we cannot parse must never be overwritten.
+        loaded = {}
+        if stamp is not None:
+            try:
+                loaded = self._read_file()
+            except Exception as e:
+                raise DataStoreError(f"data.json okunamadı, değişiklik kaydedilmedi: {e}")
+        return merge_with_defaults(loaded)
+
+    def _current_for_write(self):
+        """
+        Caller holds the file lock. Returns (snapshot, private copy) of the latest
+        data: the file is parsed again because another process may have written
+        since our last read. That parse is the private copy; only if the file did
+        change is it parsed a second time for the shared snapshot.
+        """
+        stamp = self._file_stamp()
+        data = self._parse_for_write(stamp)
+        with self._lock:
+            if self._data is None or stamp != self._stamp:
+                self._set_snapshot(self._parse_for_write(stamp), stamp)
+            return self._data, data
+
+    def _write(self, data):
+        # Caller holds the file lock
+        data['data_version'] = self.version + 1
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        for attempt in range(10):
+            try:
+                os.replace(tmp_path, self.path)
+                break
+            except PermissionError:
+                # Windows: a reader in another process still has data.json open
+                if attempt == 9:
+                    raise
+                time.sleep(0.05)
+        with self._lock:
+            self._set_snapshot(data, self._file_stamp())
+
+    def update(self, mutate):
+        """
+        Atomic read-modify-write. mutate(data) gets a private copy of the latest
+        data and edits it in place; the result is written only if something changed.
+        Returns whatever mutate returns.
+        """
+        with self._file_lock:
+            current, data = self._current_for_write()
+            result = mutate(data)
+            if data != current:
+                self._write(data)
+            return result
+
+    def save(self, data):
+        """Replace the whole document (prefer update() for read-modify-write)."""
+        with self._file_lock:
+            try:
+                self._current_for_write()
+            except DataStoreError as e:
+                # Whole-document write, safe to replace an unreadable file
+                logger.error(str(e))
+            self._write(copy.deepcopy(data))
+
+    def invalidate(self):
+        """Force the next read() to go back to disk."""
+        with self._lock:
+            self._stamp = None
+
+    def use_file(self, path):
+        """Point the store at another data file (benchmarks, tools)."""
+        with self._lock:
+            self.path = path
+            self._file_lock = FileLock(path + '.lock')
+            self._stamp = None
+
+
+def create_store():
+    """Storage engine picked by STORAGE_ENGINE ("json" or "sqlite")."""
+    if config.STORAGE_ENGINE == 'sqlite':
+        from src.common.sqlite_store import SqliteStore
+        return SqliteStore(config.SQLITE_FILE, migrate_from=config.DATA_FILE)
+    return DataStore(config.DATA_FILE)
+
+
+store = create_store()
+
+
+def read_data():
+    return store.read()
+
+
+def save_data(data):
+    store.save(data)
+
+
+def update_data(mutate):
+    return store.update(mutate)
@@ -0,0 +1,49 @@
+"""
+Per-day status table for the kiosk status endpoint.
+
+The duty list and the "class: lesson" strings only depend on data.json and the
+weekday, so DayTable builds them once per data version and day; get_status then
+picks the lists for the current slot instead of walking every class each request.
+"""
+from src.common import data_store
+
+SCHOOL_DAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday")
+
+
+class DayTable:
+    def __init__(self, data, day):
+        self.day = day
+        self.duty_teachers = []
+        for item in data.get('duty_roster', []):
+            teacher = item.get('schedule', {}).get(day, '')
+            if teacher:
+                self.duty_teachers.append(f"{item['location']}: {teacher}")
+
+        # lessons[i]: finished "9-A: Matematik" strings for lesson index i, in class order
+        self.lessons = []
+        if day in SCHOOL_DAYS:
+            for cls in data.get('class_schedules', []):
+                program = cls.get('program', {}).get(day, [])
+                for i, lesson_name in enumerate(program):
+                    if not lesson_name:
+                        continue
+                    while len(self.lessons) <= i:
+                        self.lessons.append([])
+                    self.lessons[i].append(f"{cls['name']}: {lesson_name}")
+
+    def classes_at(self, lesson_index):
+        """Class strings for a 0-based lesson index ([] for -1 or past the last lesson)."""
+        if 0 <= lesson_index < len(self.lessons):
+            return self.lessons[lesson_index]
+        return []
+
+    def for_slot(self, slot_state):
+        """(class_statuses, next_class_statuses) for a schedule.SlotState."""
+        if slot_state.lesson_index != -1:
+            return self.classes_at(slot_state.lesson_index), []
+        return [], self.classes_at(slot_state.next_lesson_index)
+
+
+def get_day_table(day):
+    """DayTable for an English weekday name, rebuilt only when the data changes."""
+    return data_store.store.derived(('day_table', day), lambda data: DayTable(data, day))
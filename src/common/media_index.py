@@ -0,0 +1,126 @@
+"""
+Cached index of the slideshow / riddle folders.
+
+The folder is scanned once with os.scandir. Afterwards only the directory's own
+mtime is checked (at most once per `check_interval` seconds) and, when it moves,
+the folder is re-listed and only new files are looked up in the media
+manifest (probed and recorded there on first sight, see media_manifest.py).
+"""
+import os
+import threading
+import time
+from collections import namedtuple
+
+import config
+from src.common.media_manifest import manifest
+
+# mtime is the upload time from the manifest
+MediaEntry = namedtuple('MediaEntry', ['name', 'ext', 'size', 'mtime', 'mime', 'kind',
+                                       'width', 'height', 'duration', 'sha256', 'uploader'])
+
+SLIDE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.mp4', '.webm')
+RIDDLE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp')
+
+_UNSCANNED = object()
+
+
+def media_entry(name, ext, info):
+    return MediaEntry(name, ext, info['size'], info['uploaded_at'], info['mime'], info['kind'],
+                      info['width'], info['height'], info['duration'], info['sha256'], info['uploader'])
+
+
+class MediaIndex:
+    def __init__(self, directory, extensions, manifest, check_interval=1.0):
+        self.directory = directory
+        self.extensions = extensions
+        self.manifest = manifest
+        self.check_interval = check_interval
+        self.version = 0
+        self._entries = {}
+        self._dir_mtime = _UNSCANNED
+        self._checked_at = 0.0
+        self._derived = {}
+        self._lock = threading.Lock()
+
+    def _stat_dir(self):
+        try:
+            return os.stat(self.directory).st_mtime_ns
+        except OSError:
+            return None
+
+    def _scan(self):
+        entries = {}
+        try:
+            it = os.scandir(self.directory)
+        except OSError:
+            return entries
+        found = []
+        with it:
+            for de in it:
+                ext = os.path.splitext(de.name)[1].lower()
+                if ext not in self.extensions:
+                    continue
+                # uuid-named files never change, so known names keep their entry
+                known = self._entries.get(de.name)
+                if known is not None:
+                    entries[de.name] = known
+                    continue
+                try:
+                    if not de.is_file():
+                        continue
+                except OSError:
+                    continue
+                found.append((de.name, ext))
+        if found or len(entries) != len(self._entries):
+            described = self.manifest.describe(self.directory, [name for name, _ in found] + list(entries))
+            for name, ext in found:
+                info = described.get(name)
+                if info is not None:
+                    entries[name] = media_entry(name, ext, info)
+        return entries
+
+    def refresh(self, force=False):
+        now = time.monotonic()
+        if not force and self._dir_mtime is not _UNSCANNED and now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+        dir_mtime = self._stat_dir()
+        if not force and dir_mtime == self._dir_mtime:
+            return
+        with self._lock:
+            self._entries = self._scan()
+            self._dir_mtime = dir_mtime
+            self._derived = {}
+            self.version += 1
+
+    def invalidate(self):
+        """Rescan on next access (call after adding/removing files in-process)."""
+        self._dir_mtime = _UNSCANNED
+
+    @property
+    def signature(self):
+        """Cross-process identifier of the current listing (directory mtime)."""
+        self.refresh()
+        return self._dir_mtime
+
+    def entries(self):
+        self.refresh()
+        return list(self._entries.values())
+
+    def get(self, name):
+        self.refresh()
+        return self._entries.get(name)
+
+    def derived(self, key, builder):
+        """Return builder(entries), computed once per listing version."""
+        self.refresh()
+        with self._lock:
+            derived = self._derived
+            entries = list(self._entries.values())
+        if key not in derived:
+            derived[key] = builder(entries)
+        return derived[key]
+
+
+slides_index = MediaIndex(config.SLIDESHOW_DIR, SLIDE_EXTENSIONS, manifest)
+riddles_index = MediaIndex(config.RIDDLES_DIR, RIDDLE_EXTENSIONS, manifest)
@@ -0,0 +1,286 @@
+"""
+Persisted facts about every slide and riddle file.
+
+Each file gets one manifest entry, written by the bot's ingest pipeline when it
+publishes the file, or on the first folder scan for files copied in by hand:
+
+    mime        sniffed from the file's first bytes, not from the extension
+    kind        'image' or 'video'
+    width/height  pixels (None if unknown)
+    duration    seconds, videos only (None if unknown)
+    size        bytes
+    sha256      of the published file
+    uploaded_at  epoch seconds
+    uploader    Telegram user id (None for files not uploaded through the bot)
+
+The manifest lives in data/media_manifest.json, keyed by folder name and file
+name. The bot and the web app both write it under a file lock; readers reload
+it when the file changes.
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import struct
+import subprocess
+import threading
+import time
+
+import config
+from src.common.data_store import FileLock
+
+logger = logging.getLogger(__name__)
+
+# Entries of files missing from the folder are kept this long: ingest records
+# a file just before it is moved into the folder
+PRUNE_GRACE = 60  # seconds
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp')
+VIDEO_EXTENSIONS = ('.mp4', '.webm')
+
+
+def media_type(ext):
+    return 'video' if ext in VIDEO_EXTENSIONS else 'image'
+
+
+def sniff_mime(head):
+    """MIME type from the first bytes of a file."""
+    if head.startswith(b'\xff\xd8\xff'):
+        return 'image/jpeg'
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'image/png'
+    if head[:6] in (b'GIF87a', b'GIF89a'):
+        return 'image/gif'
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'image/webp'
+    if head[4:8] == b'ftyp':
+        return 'video/quicktime' if head[8:12] == b'qt  ' else 'video/mp4'
+    if head[:4] == b'\x1a\x45\xdf\xa3':
+        return 'video/webm'
+    return 'application/octet-stream'
+
+
+def _boxes(f, start, end):
+    """Yield (type, payload_offset, payload_end) of the ISO-BMFF boxes in [start, end)."""
+    offset = start
+    while offset + 8 <= end:
+        f.seek(offset)
+        header = f.read(8)
+        if len(header) < 8:
+            return
+        size, box_type = struct.unpack('>I4s', header)
+        payload = offset + 8
+        if size == 1:
+            size = struct.unpack('>Q', f.read(8))[0]
+            payload += 8
+        elif size == 0:
+            size = end - offset
+        if size < payload - offset:
+            return
+        yield box_type, payload, offset + size
+        offset += size
+
+
+def _mp4_info(path):
+    """(width, height, duration) from the moov box of an MP4 / MOV file."""
+    width = height = duration = None
+    with open(path, 'rb') as f:
+        end = os.fstat(f.fileno()).st_size
+        for box_type, start, stop in _boxes(f, 0, end):
+            if box_type != b'moov':
+                continue
+            for child, cstart, cstop in _boxes(f, start, stop):
+                if child == b'mvhd':
+                    f.seek(cstart)
+                    version = f.read(1)[0]
+                    if version == 1:
+                        f.seek(cstart + 20)
+                        timescale, length = struct.unpack('>IQ', f.read(12))
+                    else:
+                        f.seek(cstart + 12)
+                        timescale, length = struct.unpack('>II', f.read(8))
+                    if timescale:
+                        duration = round(length / timescale, 3)
+                elif child == b'trak' and width is None:
+                    for grandchild, gstart, gstop in _boxes(f, cstart, cstop):
+                        if grandchild == b'tkhd':
+                            # Width and height (16.16 fixed point) close the box
+                            f.seek(gstop - 8)
+                            w, h = struct.unpack('>II', f.read(8))
+                            if w and h:
+                                width, height = w >> 16, h >> 16
+            break
+    return width, height, duration
+
+
+def _ffprobe_info(path):
+    """(width, height, duration) via ffprobe, if it is on PATH."""
+    ffprobe = shutil.which('ffprobe')
+    if not ffprobe:
+        return None, None, None
+    try:
+        result = subprocess.run(
+            [ffprobe, '-v', 'error', '-select_streams', 'v:0', '-show_entries',
+             'stream=width,height:format=duration', '-of', 'json', path],
+            capture_output=True, timeout=30
+        )
+        info = json.loads(result.stdout or b'{}')
+    except (OSError, ValueError, subprocess.SubprocessError):
+        return None, None, None
+    stream = (info.get('streams') or [{}])[0]
+    duration = info.get('format', {}).get('duration')
+    return stream.get('width'), stream.get('height'), round(float(duration), 3) if duration else None
+
+
+def _image_size(path):
+    from PIL import Image
+    try:
+        with Image.open(path) as img:  # Reads the header only
+            return img.size
+    except Exception:
+        return None, None
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def describe_file(path, uploaded_at=None, uploader=None):
+    """Build the manifest entry for a media file."""
+    st = os.stat(path)
+    with open(path, 'rb') as f:
+        mime = sniff_mime(f.read(16))
+    if mime.startswith('video/'):
+        kind = 'video'
+    elif mime.startswith('image/'):
+        kind = 'image'
+    else:
+        # Unrecognized content: go by the extension like the folder listing does
+        kind = media_type(os.path.splitext(path)[1].lower())
+
+    width = height = duration = None
+    if mime in ('video/mp4', 'video/quicktime'):
+        try:
+            width, height, duration = _mp4_info(path)
+        except (OSError, struct.error, IndexError) as e:
+            logger.warning(f"MP4 header unreadable for {os.path.basename(path)}: {e}")
+    if kind == 'video' and duration is None:
+        width, height, duration = _ffprobe_info(path)
+    elif kind == 'image':
+        width, height = _image_size(path)
+
+    return {
+        'mime': mime,
+        'kind': kind,
+        'width': width,
+        'height': height,
+        'duration': duration,
+        'size': st.st_size,
+        'sha256': file_sha256(path),
+        'uploaded_at': st.st_mtime if uploaded_at is None else uploaded_at,
+        'uploader': uploader,
+    }
+
+
+class MediaManifest:
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self.use_file(path)
+
+    def use_file(self, path):
+        """Point the manifest at another file (benchmarks, tools)."""
+        with self._lock:
+            self.path = path
+            self._file_lock = FileLock(path + '.lock')
+            self._data = {}
+            self._stamp = None
+
+    def _file_stamp(self):
+        try:
+            st = os.stat(self.path)
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    def _reload(self):
+        """Re-read the file if another process (or thread) changed it. Caller holds _lock."""
+        stamp = self._file_stamp()
+        if stamp == self._stamp:
+            return
+        data = {}
+        if stamp is not None:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.error(f"Media manifest unreadable, rebuilding: {e}")
+        self._data = data
+        self._stamp = stamp
+
+    def _save(self):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._data, f)
+        os.replace(tmp_path, self.path)
+        self._stamp = self._file_stamp()
+
+    def _update(self, mutate):
+        with self._lock, self._file_lock:
+            self._reload()
+            if mutate(self._data):
+                self._save()
+
+    def record(self, directory, name, entry):
+        def mutate(data):
+            data.setdefault(os.path.basename(directory), {})[name] = entry
+            return True
+        self._update(mutate)
+
+    def remove(self, directory, name):
+        def mutate(data):
+            return data.get(os.path.basename(directory), {}).pop(name, None) is not None
+        self._update(mutate)
+
+    def describe(self, directory, names):
+        """
+        Entries for the files `names` of `directory` (the current folder listing).
+        Files without an entry are probed once and recorded; entries of files that
+        are gone are dropped.
+        """
+        folder_key = os.path.basename(directory)
+        names = set(names)
+        with self._lock:
+            self._reload()
+            folder = dict(self._data.get(folder_key, {}))
+        missing = [name for name in names if name not in folder]
+        stale = [name for name, entry in folder.items()
+                 if name not in names and time.time() - entry.get('uploaded_at', 0) > PRUNE_GRACE]
+        if not missing and not stale:
+            return folder
+
+        probed = {}
+        for name in missing:
+            try:
+                probed[name] = describe_file(os.path.join(directory, name))
+            except OSError:
+                continue  # Deleted meanwhile
+
+        def mutate(data):
+            entries = data.setdefault(folder_key, {})
+            for name in stale:
+                entries.pop(name, None)
+            for name, entry in probed.items():
+                entries.setdefault(name, entry)  # Ingest may have recorded it meanwhile
+            folder.clear()
+            folder.update(entries)
+            return True
+        self._update(mutate)
+        return folder
+
+
+manifest = MediaManifest(config.MEDIA_MANIFEST_FILE)
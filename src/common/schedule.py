@@ -0,0 +1,92 @@
+"""
+Compiled bell schedule.
+
+data['schedule'] is a list of {"name", "start", "end"} slots ("HH:MM", end inclusive).
+CompiledSchedule parses it once into minute offsets and precomputes the answer
+(current slot, current lesson, next lesson) for every interval of the day, so a
+lookup is a single bisect.
+"""
+from bisect import bisect_right
+from collections import namedtuple
+from datetime import datetime
+
+from src.common import data_store
+
+# Slot names containing these are lessons, everything else is a break
+LESSON_KEYWORDS = ("Ders", "Etüt")
+
+ScheduleSlot = namedtuple('ScheduleSlot', ['name', 'start', 'end', 'is_lesson', 'lesson_index'])
+
+# slot: ScheduleSlot or None, lesson_index/next_lesson_index: 0-based, -1 if none
+SlotState = namedtuple('SlotState', ['slot', 'lesson_index', 'next_lesson_index'])
+
+EMPTY_STATE = SlotState(None, -1, -1)
+
+
+def parse_minutes(value):
+    """'HH:MM' -> minutes since midnight"""
+    t = datetime.strptime(value, "%H:%M")
+    return t.hour * 60 + t.minute
+
+
+def is_lesson_name(name):
+    return any(k in name for k in LESSON_KEYWORDS)
+
+
+def normalize_schedule(schedule):
+    """Older data.json files store the schedule as {name: {start, end}}."""
+    if isinstance(schedule, dict):
+        return [{'name': k, 'start': v['start'], 'end': v['end']} for k, v in schedule.items()]
+    return schedule or []
+
+
+class CompiledSchedule:
+    def __init__(self, schedule):
+        self.slots = []
+        lesson_count = 0
+        for item in normalize_schedule(schedule):
+            try:
+                start = parse_minutes(item['start'])
+                end = parse_minutes(item['end'])
+            except (ValueError, KeyError, TypeError):
+                continue
+            name = item.get('name', '')
+            is_lesson = is_lesson_name(name)
+            self.slots.append(ScheduleSlot(name, start, end, is_lesson, lesson_count if is_lesson else -1))
+            if is_lesson:
+                lesson_count += 1
+        self.lessons = [s for s in self.slots if s.is_lesson]
+
+        # The answer can only change at a slot start or right after a slot end
+        self._bounds = sorted({0} | {s.start for s in self.slots} | {s.end + 1 for s in self.slots})
+        self._states = [self._compute_state(m) for m in self._bounds]
+
+    def _compute_state(self, minute):
+        # Same rules as the original get_status loops: the first slot (in list order)
+        # that contains the minute is the status, the last matching lesson wins for
+        # the lesson index, and the next lesson is the first one starting later.
+        current = next((s for s in self.slots if s.start <= minute <= s.end), None)
+        lesson_index = -1
+        for s in self.lessons:
+            if s.start <= minute <= s.end:
+                lesson_index = s.lesson_index
+        next_lesson = next((s for s in self.lessons if s.start > minute), None)
+        return SlotState(current, lesson_index, next_lesson.lesson_index if next_lesson else -1)
+
+    def at(self, minute):
+        """State for a minute offset (0-1439)."""
+        if not self.slots:
+            return EMPTY_STATE
+        return self._states[bisect_right(self._bounds, minute) - 1]
+
+    def at_time(self, when):
+        """State for a datetime/time object."""
+        return self.at(when.hour * 60 + when.minute)
+
+    def __len__(self):
+        return len(self.slots)
+
+
+def get_compiled_schedule():
+    """CompiledSchedule for the current data.json, rebuilt only when the data changes."""
+    return data_store.store.derived('schedule', lambda data: CompiledSchedule(data.get('schedule', [])))
@@ -0,0 +1,94 @@
+"""
+Streaming spreadsheet reading for the admin importers.
+
+iter_rows() yields one tuple of cell values per row from an .xlsx (openpyxl
+read-only mode, the sheet is never fully loaded) or a .csv file, so memory use
+does not grow with the number of rows.
+"""
+import csv
+import io
+import os
+import re
+
+
+class SpreadsheetError(ValueError):
+    """The file cannot be imported at all (unsupported format, no header row...)."""
+
+
+# Export tools put a few title rows above the header
+HEADER_SCAN_ROWS = 30
+
+_TR_LOWER = str.maketrans({'I': 'ı', 'İ': 'i'})
+
+
+def normalize_header(value):
+    """'Adı Soyadı' -> ['adı', 'soyadı'] (Turkish-aware lower case, punctuation dropped)."""
+    if value is None:
+        return []
+    return re.findall(r'\w+', str(value).translate(_TR_LOWER).lower())
+
+
+def _xlsx_rows(stream):
+    from openpyxl import load_workbook
+    try:
+        workbook = load_workbook(stream, read_only=True, data_only=True)
+    except Exception as e:
+        raise SpreadsheetError(f"Excel dosyası açılamadı: {e}")
+    try:
+        for row in workbook.active.iter_rows(values_only=True):
+            yield row
+    finally:
+        workbook.close()
+
+
+def _csv_rows(stream):
+    head = stream.read(8192)
+    stream.seek(0)
+    # Excel saves CSV as UTF-8 (with BOM) or as Windows-1254 (Turkish)
+    try:
+        head.decode('utf-8-sig')
+        encoding = 'utf-8-sig'
+    except UnicodeDecodeError as e:
+        # A multi-byte character cut at the end of the sample is still UTF-8
+        encoding = 'utf-8-sig' if e.start >= len(head) - 3 else 'cp1254'
+    sample = head.decode(encoding, errors='ignore')
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=';,\t')
+    except csv.Error:
+        # Sniffer gives up on rows of different lengths; go by the first line
+        first_line = sample.split('\n', 1)[0]
+        dialect = csv.excel()
+        dialect.delimiter = max(';,\t', key=first_line.count)
+    text = io.TextIOWrapper(stream, encoding=encoding, errors='replace', newline='')
+    try:
+        for row in csv.reader(text, dialect):
+            yield tuple(row)
+    finally:
+        text.detach()  # Leave the upload stream open for its owner
+
+
+def iter_rows(stream, filename):
+    """Yield row tuples from an uploaded .xlsx / .csv file."""
+    ext = os.path.splitext(filename or '')[1].lower()
+    if ext in ('.xlsx', '.xlsm'):
+        return _xlsx_rows(stream)
+    if ext in ('.csv', '.txt'):
+        return _csv_rows(stream)
+    if ext == '.xls':
+        raise SpreadsheetError("Eski .xls biçimi desteklenmiyor, dosyayı Excel'de .xlsx olarak kaydedip tekrar deneyin.")
+    raise SpreadsheetError("Desteklenmeyen dosya türü (.xlsx veya .csv yükleyin).")
+
+
+def find_header(rows, match, expected):
+    """
+    Consume rows until match(normalized_cells) returns a column mapping (dict).
+    Returns (mapping, header_row_number); rows continues after the header.
+    `expected` names the columns for the error message.
+    """
+    for row_number, row in enumerate(rows, start=1):
+        mapping = match([normalize_header(cell) for cell in row])
+        if mapping:
+            return mapping, row_number
+        if row_number >= HEADER_SCAN_ROWS:
+            break
+    raise SpreadsheetError(f"Sütunlar bulunamadı ({expected}).")
@@ -0,0 +1,319 @@
+"""
+SQLite storage engine (STORAGE_ENGINE=sqlite).
+
+Same interface as DataStore: read() returns the merged snapshot dict and
+update(mutate) is an atomic read-modify-write. On disk, the large lists live in
+their own tables with one row per entry, and a write only touches the rows that
+changed, so adding one birthday is one INSERT instead of rewriting the whole
+document. Every other top-level key is a row of the settings table.
+
+The database runs in WAL mode: kiosk reads never wait for a bot write and
+vice versa. An existing data.json is imported once on first start and renamed
+to data.json.migrated.
+"""
+import copy
+import json
+import logging
+import os
+import sqlite3
+import threading
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+from src.common.data_store import DataStoreError, SnapshotStore, copy_json, merge_with_defaults
+
+logger = logging.getLogger(__name__)
+
+# List key -> fields copied out of each entry into indexed columns
+LIST_TABLES = {
+    'birthdays': ('name', 'date'),
+    'class_schedules': ('name',),
+    'duty_roster': ('location',),
+    'messages': (),
+    'quotes': (),
+}
+
+# Below this gap between neighbouring positions a table is renumbered
+MIN_POSITION_GAP = 1e-6
+
+
+def _dumps(value):
+    return json.dumps(value, ensure_ascii=False, sort_keys=True)
+
+
+def _columns(fields, item):
+    if not isinstance(item, dict):
+        return [None] * len(fields)
+    return [None if item.get(f) is None else str(item.get(f)) for f in fields]
+
+
+class SqliteStore(SnapshotStore):
+    def __init__(self, path, migrate_from=None):
+        super().__init__()
+        self.version = 0
+        self._lock = threading.Lock()        # Snapshot swap + reader connection
+        self._write_lock = threading.RLock()  # One writer per process, BEGIN IMMEDIATE across processes
+        self._open(path)
+        self._initialize(migrate_from)
+
+    # --- Connection / schema ---
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=FULL')  # Kiosk PCs lose power; same guarantee as the fsync'ed data.json
+        return conn
+
+    def _open(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._writer = self._connect()
+        self._reader = self._connect()
+        self._data = None
+        self._rows = {}
+        self._seen = None  # PRAGMA data_version of the reader at the last check
+        self._create_schema()
+
+    def _create_schema(self):
+        statements = ['CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT NOT NULL)']
+        for table, fields in LIST_TABLES.items():
+            extra = ''.join(f', {f} TEXT' for f in fields)
+            statements.append(f'CREATE TABLE IF NOT EXISTS {table} '
+                              f'(id INTEGER PRIMARY KEY, pos REAL NOT NULL, item TEXT NOT NULL{extra})')
+            statements.append(f'CREATE INDEX IF NOT EXISTS {table}_pos ON {table} (pos)')
+            for f in fields:
+                statements.append(f'CREATE INDEX IF NOT EXISTS {table}_{f} ON {table} ({f})')
+        with self._write_lock:
+            for statement in statements:
+                self._writer.execute(statement)
+
+    def _initialize(self, migrate_from):
+        """Fill an empty database from data.json (or the defaults)."""
+        migrated = None
+        with self._transaction() as conn:
+            if self._stored_version(conn) is not None:
+                return
+            raw = {}
+            if migrate_from and os.path.exists(migrate_from):
+                try:
+                    with open(migrate_from, 'r', encoding='utf-8') as f:
+                        raw = json.load(f)
+                except (OSError, ValueError) as e:
+                    raise DataStoreError(f"data.json okunamadı, SQLite'a aktarılamadı: {e}")
+                migrated = migrate_from
+            data = merge_with_defaults(raw)
+            data.setdefault('data_version', 0)
+            for key, value in data.items():
+                if key not in LIST_TABLES:
+                    conn.execute('INSERT INTO settings (key, value) VALUES (?, ?)', (key, _dumps(value)))
+            for table, fields in LIST_TABLES.items():
+                self._insert_rows(conn, table, fields, [(float(i), item) for i, item in enumerate(data[table])])
+        if migrated:
+            os.replace(migrated, migrated + '.migrated')
+            logger.info(f"Migrated {migrated} to {self.path}")
+
+    # --- Transactions ---
+
+    @contextmanager
+    def _transaction(self):
+        """Write transaction; BEGIN IMMEDIATE takes the database write lock up front."""
+        with self._write_lock:
+            self._writer.execute('BEGIN IMMEDIATE')
+            try:
+                yield self._writer
+            except BaseException:
+                self._writer.execute('ROLLBACK')
+                raise
+            self._writer.execute('COMMIT')
+
+    # --- Reading ---
+
+    @staticmethod
+    def _stored_version(conn):
+        row = conn.execute("SELECT value FROM settings WHERE key = 'data_version'").fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def _load(self, conn):
+        raw = {key: json.loads(value) for key, value in conn.execute('SELECT key, value FROM settings')}
+        rows = {}
+        for table in LIST_TABLES:
+            rows[table] = conn.execute(f'SELECT id, pos, item FROM {table} ORDER BY pos').fetchall()
+            raw[table] = [json.loads(item) for _, _, item in rows[table]]
+        return merge_with_defaults(raw), rows
+
+    def _set_snapshot(self, data, rows):
+        self._data = data
+        self._rows = rows
+        self.version = data.get('data_version', 0)
+
+    def read(self):
+        """Return the current snapshot (shared, do not mutate)."""
+        with self._lock:
+            # Changes whenever any connection (this process or another) commits
+            seen = self._reader.execute('PRAGMA data_version').fetchone()[0]
+            if self._data is not None and seen == self._seen:
+                return self._data
+            self._seen = seen
+            if self._data is None or self._stored_version(self._reader) != self.version:
+                self._reader.execute('BEGIN')
+                try:
+                    self._set_snapshot(*self._load(self._reader))
+                finally:
+                    self._reader.execute('COMMIT')
+            return self._data
+
+    @property
+    def etag(self):
+        """Stable (cross-process) identifier of the current snapshot."""
+        self.read()
+        return f"sql{self.version}"
+
+    # --- Writing ---
+
+    def update(self, mutate):
+        """
+        Atomic read-modify-write. mutate(data) gets a private copy of the latest
+        data and edits it in place; only the rows that changed are written.
+        Returns whatever mutate returns.
+        """
+        with self._transaction() as conn:
+            if self._data is None or self._stored_version(conn) != self.version:
+                with self._lock:
+                    self._set_snapshot(*self._load(conn))
+            current = self._data
+            data = copy_json(current)
+            result = mutate(data)
+            if data == current:
+                return result
+            data['data_version'] = self.version + 1
+            rows = self._write_changes(conn, current, data)
+        with self._lock:
+            self._set_snapshot(data, rows)
+        return result
+
+    def save(self, data):
+        """Replace the whole document (prefer update() for read-modify-write)."""
+        def replace(current):
+            current.clear()
+            current.update(copy.deepcopy(data))
+        self.update(replace)
+
+    def _write_changes(self, conn, old, new):
+        for key in set(old) | set(new):
+            if key in LIST_TABLES or old.get(key) == new.get(key):
+                continue
+            if key in new:
+                conn.execute('INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)', (key, _dumps(new[key])))
+            else:
+                conn.execute('DELETE FROM settings WHERE key = ?', (key,))
+        rows = dict(self._rows)
+        for table, fields in LIST_TABLES.items():
+            items = new.get(table)
+            if not isinstance(items, list):
+                items = new[table] = []
+            if items != old.get(table):
+                rows[table] = self._write_list(conn, table, fields, self._rows.get(table, []),
+                                                old.get(table, []), items)
+        return rows
+
+    def _insert_rows(self, conn, table, fields, positioned):
+        """Insert (pos, item) pairs, return their (id, pos, text) rows."""
+        placeholders = ', '.join('?' * (len(fields) + 2))
+        names = ', '.join(('pos', 'item') + fields)
+        rows = []
+        for pos, item in positioned:
+            text = _dumps(item)
+            cursor = conn.execute(f'INSERT INTO {table} ({names}) VALUES ({placeholders})',
+                                  [pos, text] + _columns(fields, item))
+            rows.append((cursor.lastrowid, pos, text))
+        return rows
+
+    def _write_list(self, conn, table, fields, old_rows, old_items, items):
+        """
+        Row-level diff of one list. Entries that are still present in the same
+        relative order keep their row; changed entries are updated in place,
+        new ones are inserted between their neighbours' positions and removed
+        ones deleted. Returns the new (id, pos, text) rows in list order.
+        """
+        # Most edits touch one end or one spot: skip the unchanged head and tail
+        head = 0
+        limit = min(len(old_items), len(items))
+        while head < limit and old_items[head] == items[head]:
+            head += 1
+        tail = 0
+        while tail < limit - head and old_items[-1 - tail] == items[-1 - tail]:
+            tail += 1
+        old_mid = old_rows[head:len(old_rows) - tail]
+        new_mid = items[head:len(items) - tail]
+        span = len(new_mid) + 1
+        lo = old_rows[head - 1][1] if head else (old_rows[0][1] if old_rows else 0.0) - span
+        hi = old_rows[len(old_rows) - tail][1] if tail else (old_rows[-1][1] if old_rows else 0.0) + span
+
+        texts = [_dumps(item) for item in new_mid]
+
+        # Unchanged entries inside the changed part, matched in order
+        where = defaultdict(deque)
+        for i, (_, _, text) in enumerate(old_mid):
+            where[text].append(i)
+        anchors = []
+        last = -1
+        for j, text in enumerate(texts):
+            candidates = where.get(text)
+            while candidates and candidates[0] <= last:
+                candidates.popleft()
+            if candidates:
+                last = candidates.popleft()
+                anchors.append((last, j))
+
+        result = []
+        updates, deletes, inserts = [], [], []
+        renumber = False
+        prev_old, prev_new = -1, -1
+        for anchor_old, anchor_new in anchors + [(len(old_mid), len(new_mid))]:
+            old_run = old_mid[prev_old + 1:anchor_old]
+            new_run = range(prev_new + 1, anchor_new)
+            paired = min(len(old_run), len(new_run))
+            for (row_id, pos, _), j in zip(old_run, new_run):
+                updates.append([texts[j]] + _columns(fields, new_mid[j]) + [row_id])
+                result.append((row_id, pos, texts[j]))
+            deletes.extend((row_id,) for row_id, _, _ in old_run[paired:])
+            extra = new_run[paired:]
+            if extra:
+                base = result[-1][1] if result else lo
+                upper = old_mid[anchor_old][1] if anchor_old < len(old_mid) else hi
+                step = (upper - base) / (len(extra) + 1)
+                renumber = renumber or step < MIN_POSITION_GAP
+                for k, j in enumerate(extra, start=1):
+                    inserts.append((len(result), base + step * k, new_mid[j]))
+                    result.append(None)  # Filled in after the INSERT
+            if anchor_old < len(old_mid):
+                result.append(old_mid[anchor_old])
+            prev_old, prev_new = anchor_old, anchor_new
+
+        assignments = ', '.join(['item = ?'] + [f'{f} = ?' for f in fields])
+        conn.executemany(f'UPDATE {table} SET {assignments} WHERE id = ?', updates)
+        conn.executemany(f'DELETE FROM {table} WHERE id = ?', deletes)
+        inserted = self._insert_rows(conn, table, fields, [(pos, item) for _, pos, item in inserts])
+        for (index, _, _), row in zip(inserts, inserted):
+            result[index] = row
+        result = old_rows[:head] + result + old_rows[len(old_rows) - tail:]
+        if renumber:
+            conn.executemany(f'UPDATE {table} SET pos = ? WHERE id = ?',
+                             [(float(i), row_id) for i, (row_id, _, _) in enumerate(result)])
+            result = [(row_id, float(i), text) for i, (row_id, _, text) in enumerate(result)]
+        return result
+
+    # --- Maintenance ---
+
+    def invalidate(self):
+        """Re-check the stored data version on the next read()."""
+        with self._lock:
+            self._seen = None
+
+    def use_file(self, path, migrate_from=None):
+        """Point the store at another database file (benchmarks, tools)."""
+        with self._write_lock, self._lock:
+            self._writer.close()
+            self._reader.close()
+            self._open(path)
+        self._initialize(migrate_from)
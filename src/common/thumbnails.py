@@ -0,0 +1,81 @@
+"""
+Sidecar thumbnail cache for slides and riddles.
+
+Thumbnails are small JPEGs stored in config.THUMBNAIL_DIR as "<media name>.jpg".
+Media files are uuid-named and never change, so a thumbnail never goes stale.
+Video posters need ffmpeg on PATH; without it videos simply have no thumbnail.
+"""
+import logging
+import os
+import shutil
+import subprocess
+import uuid
+
+import config
+from src.common.media_manifest import VIDEO_EXTENSIONS
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_SIZE = (320, 240)
+THUMBNAIL_QUALITY = 75
+
+
+def thumbnail_name(media_name):
+    return f"{media_name}.jpg"
+
+
+def thumbnail_path(media_name):
+    return os.path.join(config.THUMBNAIL_DIR, thumbnail_name(media_name))
+
+
+def _make_image_thumbnail(src, dst):
+    from PIL import Image, ImageOps
+    with Image.open(src) as img:
+        img.draft('RGB', THUMBNAIL_SIZE)  # Lets JPEG decode at reduced scale
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail(THUMBNAIL_SIZE)
+        img.convert('RGB').save(dst, 'JPEG', quality=THUMBNAIL_QUALITY)
+
+
+def _make_video_poster(src, dst):
+    ffmpeg = shutil.which('ffmpeg')
+    if not ffmpeg:
+        return False
+    result = subprocess.run(
+        [ffmpeg, '-v', 'error', '-y', '-ss', '1', '-i', src, '-frames:v', '1',
+         '-vf', f"scale={THUMBNAIL_SIZE[0]}:-2", '-f', 'image2', dst],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=30
+    )
+    return result.returncode == 0 and os.path.exists(dst)
+
+
+def make_thumbnail(src):
+    """Create the thumbnail for a media file. Returns its path, or None if not possible."""
+    name = os.path.basename(src)
+    dst = thumbnail_path(name)
+    if os.path.exists(dst):
+        return dst
+    os.makedirs(config.THUMBNAIL_DIR, exist_ok=True)
+    # Write under a temp name so a concurrent request never serves half a file
+    tmp = os.path.join(config.THUMBNAIL_DIR, f".{uuid.uuid4()}.tmp")
+    try:
+        if os.path.splitext(name)[1].lower() in VIDEO_EXTENSIONS:
+            if not _make_video_poster(src, tmp):
+                return None
+        else:
+            _make_image_thumbnail(src, tmp)
+        os.replace(tmp, dst)
+        return dst
+    except Exception as e:
+        logger.warning(f"Thumbnail failed for {name}: {e}")
+        return None
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def remove_thumbnail(media_name):
+    try:
+        os.remove(thumbnail_path(media_name))
+    except OSError:
+        pass
@@ -0,0 +1,261 @@
+"""
+Bulk import / export of class timetables and the duty roster.
+
+Timetable file: one row per class and day, no limit on the number of classes
+
+    Sınıf | Gün       | 1         | 2      | ...
+    9-A   | Pazartesi | Matematik | Fizik  | ...
+
+Duty roster file: one row per duty location
+
+    Nöbet Yeri | Pazartesi | Salı | Çarşamba | Perşembe | Cuma
+
+Imports are validated as a whole and then merged into data: classes / locations
+are matched by name, only the ones whose content differs are replaced, so
+re-importing an exported file changes nothing (and data.json is not rewritten).
+"""
+import csv
+import io
+
+from src.common.spreadsheet import find_header, iter_rows, normalize_header
+
+DAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
+DAY_NAMES_TR = ['Pazartesi', 'Salı', 'Çarşamba', 'Perşembe', 'Cuma']
+
+# normalize_header() form of every accepted day name
+_DAY_LOOKUP = {}
+for _en, _tr in zip(DAYS, DAY_NAMES_TR):
+    for _name in (_en, _tr, _tr.replace('ı', 'i').replace('ç', 'c').replace('ş', 's')):
+        _DAY_LOOKUP[' '.join(normalize_header(_name))] = _en
+
+CLASS_WORDS = {'sınıf', 'sinif', 'şube', 'sube', 'class'}
+DAY_WORDS = {'gün', 'gun', 'day'}
+LOCATION_WORDS = {'nöbet', 'nobet', 'yer', 'yeri', 'location'}
+
+
+class ImportResult:
+    """What a merge changed, for the admin message."""
+
+    def __init__(self):
+        self.added = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.removed = 0
+
+    def summary(self, noun):
+        parts = [f"{self.added} {noun} eklendi", f"{self.updated} güncellendi", f"{self.unchanged} aynı"]
+        if self.removed:
+            parts.append(f"{self.removed} silindi")
+        return ", ".join(parts) + "."
+
+
+def parse_day(value):
+    """'Pazartesi' / 'PAZARTESİ' / 'Monday' -> 'Monday'; None if not a school day."""
+    return _DAY_LOOKUP.get(' '.join(normalize_header(value)))
+
+
+def _text(value):
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def _cell(row, index):
+    return _text(row[index]) if index < len(row) else ''
+
+
+def _trim(lessons):
+    """Trailing empty lessons carry no information (the admin form pads to 8)."""
+    lessons = list(lessons)
+    while lessons and not lessons[-1]:
+        lessons.pop()
+    return lessons
+
+
+def _is_empty(row):
+    return not any(_text(cell) for cell in row)
+
+
+# --- Timetable ---
+
+def _match_timetable_header(cells):
+    columns = {'class': None, 'day': None, 'lessons': []}
+    for i, words in enumerate(cells):
+        if not words:
+            continue
+        if columns['class'] is None and CLASS_WORDS.intersection(words):
+            columns['class'] = i
+        elif columns['day'] is None and DAY_WORDS.intersection(words):
+            columns['day'] = i
+        elif words[0].isdigit():  # "1", "1. Ders"
+            columns['lessons'].append((int(words[0]), i))
+    if columns['class'] is None or columns['day'] is None or not columns['lessons']:
+        return None
+    columns['lessons'] = [i for _, i in sorted(columns['lessons'])]
+    return columns
+
+
+def read_timetable(stream, filename):
+    """
+    Parse a timetable file into ({class name: {day: [lessons]}}, errors).
+    Classes keep the order of their first row. Raises SpreadsheetError if the
+    file or its header row cannot be read.
+    """
+    rows = iter_rows(stream, filename)
+    columns, row_number = find_header(rows, _match_timetable_header, expected="Sınıf, Gün, 1, 2, ...")
+    classes = {}
+    errors = []
+    for row_number, row in enumerate(rows, start=row_number + 1):
+        if _is_empty(row):
+            continue
+        name = _cell(row, columns['class'])
+        raw_day = _cell(row, columns['day'])
+        if not name:
+            errors.append(f"Satır {row_number}: sınıf adı boş")
+            continue
+        day = parse_day(raw_day)
+        if day is None:
+            errors.append(f"Satır {row_number}: gün okunamadı ({raw_day})")
+            continue
+        program = classes.setdefault(name, {})
+        if day in program:
+            errors.append(f"Satır {row_number}: {name} için {raw_day} tekrar ediyor")
+            continue
+        program[day] = _trim(_cell(row, i) for i in columns['lessons'])
+    return classes, errors
+
+
+def merge_timetable(data, classes, replace=False):
+    """
+    Merge read_timetable() output into data['class_schedules'] in place.
+    Days missing from the file keep their current lessons; with replace=True
+    classes that are not in the file are removed.
+    """
+    result = ImportResult()
+    current = data.setdefault('class_schedules', [])
+    by_name = {cls.get('name'): cls for cls in current}
+    for name, days in classes.items():
+        existing = by_name.get(name)
+        if existing is None:
+            current.append({'name': name, 'program': {day: days.get(day, []) for day in DAYS}})
+            result.added += 1
+            continue
+        program = existing.setdefault('program', {})
+        changed = [day for day, lessons in days.items() if _trim(program.get(day, [])) != lessons]
+        for day in changed:
+            program[day] = days[day]
+        if changed:
+            result.updated += 1
+        else:
+            result.unchanged += 1
+    if replace:
+        kept = [cls for cls in current if cls.get('name') in classes]
+        result.removed = len(current) - len(kept)
+        current[:] = kept
+    return result
+
+
+def timetable_rows(data):
+    """Header + one row per class and day, as written by export."""
+    schedules = data.get('class_schedules', [])
+    width = max((len(_trim(lessons)) for cls in schedules for lessons in cls.get('program', {}).values()),
+                default=0)
+    width = max(width, 8)
+    yield ['Sınıf', 'Gün'] + [str(i) for i in range(1, width + 1)]
+    for cls in schedules:
+        program = cls.get('program', {})
+        for day, day_tr in zip(DAYS, DAY_NAMES_TR):
+            lessons = _trim(program.get(day, []))
+            yield [cls.get('name', ''), day_tr] + lessons + [''] * (width - len(lessons))
+
+
+# --- Duty roster ---
+
+def _match_roster_header(cells):
+    columns = {'location': None, 'days': {}}
+    for i, words in enumerate(cells):
+        day = parse_day(' '.join(words))
+        if day and day not in columns['days']:
+            columns['days'][day] = i
+        elif columns['location'] is None and LOCATION_WORDS.intersection(words):
+            columns['location'] = i
+    if columns['location'] is None or not columns['days']:
+        return None
+    return columns
+
+
+def read_roster(stream, filename):
+    """Parse a duty roster file into ({location: {day: teacher}}, errors)."""
+    rows = iter_rows(stream, filename)
+    columns, row_number = find_header(rows, _match_roster_header,
+                                      expected="Nöbet Yeri, " + ", ".join(DAY_NAMES_TR))
+    locations = {}
+    errors = []
+    for row_number, row in enumerate(rows, start=row_number + 1):
+        if _is_empty(row):
+            continue
+        location = _cell(row, columns['location'])
+        if not location:
+            errors.append(f"Satır {row_number}: nöbet yeri boş")
+            continue
+        if location in locations:
+            errors.append(f"Satır {row_number}: {location} tekrar ediyor")
+            continue
+        locations[location] = {day: _cell(row, i) for day, i in columns['days'].items()}
+    return locations, errors
+
+
+def merge_roster(data, locations, replace=False):
+    """Merge read_roster() output into data['duty_roster'] in place (same rules as merge_timetable)."""
+    result = ImportResult()
+    current = data.setdefault('duty_roster', [])
+    by_location = {item.get('location'): item for item in current}
+    for location, days in locations.items():
+        existing = by_location.get(location)
+        if existing is None:
+            current.append({'location': location, 'schedule': {day: days.get(day, '') for day in DAYS}})
+            result.added += 1
+            continue
+        schedule = existing.setdefault('schedule', {})
+        changed = [day for day, teacher in days.items() if schedule.get(day, '') != teacher]
+        for day in changed:
+            schedule[day] = days[day]
+        if changed:
+            result.updated += 1
+        else:
+            result.unchanged += 1
+    if replace:
+        kept = [item for item in current if item.get('location') in locations]
+        result.removed = len(current) - len(kept)
+        current[:] = kept
+    return result
+
+
+def roster_rows(data):
+    yield ['Nöbet Yeri'] + DAY_NAMES_TR
+    for item in data.get('duty_roster', []):
+        schedule = item.get('schedule', {})
+        yield [item.get('location', '')] + [schedule.get(day, '') for day in DAYS]
+
+
+# --- Export ---
+
+def write_csv(rows):
+    """Rows -> CSV bytes that Excel opens directly (UTF-8 with BOM, ';' separated)."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=';')
+    writer.writerows(rows)
+    return buffer.getvalue().encode('utf-8-sig')
+
+
+def write_xlsx(rows, title):
+    from openpyxl import Workbook
+    workbook = Workbook(write_only=True)  # Rows are streamed to the file, not kept as cell objects
+    sheet = workbook.create_sheet(title)
+    for row in rows:
+        sheet.append(row)
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
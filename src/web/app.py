@@ -1,11 +1,14 @@
-from flask import Flask, render_template, jsonify, request, redirect, url_for, session
+from flask import Flask, Response, abort, render_template, jsonify, request, redirect, send_from_directory, url_for, session
 import os
 import json
-import copy
+import base64
+import hashlib
+import random
+import threading
+import time
 from datetime import datetime
 import locale
 import sys
-import pandas as pd
 import subprocess
 from logging.handlers import RotatingFileHandler
 import traceback
@@ -21,6 +24,19 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(
 
 import config
 import logging
+from src.common.data_store import store, read_data, update_data, DataStoreError
+from src.common.schedule import get_compiled_schedule
+from src.common.day_status import SCHOOL_DAYS, get_day_table
+from src.common.birthdays import get_birthday_index, entry_key, read_birthdays
+from src.common.spreadsheet import SpreadsheetError
+from src.common import timetable
+from src.common.media_index import slides_index, riddles_index
+from src.common.media_manifest import manifest
+from src.common import thumbnails
+from src.common import bus
+from src.web.stream import StreamHub
+from src.web.server import DETACH_KEY
+from src.web.cache import SingleFlightCache
 
 # Set locale for Turkish day names
 try:
@@ -47,79 +63,70 @@ handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s -
 app.logger.addHandler(handler)
 app.logger.setLevel(logging.INFO)
 logging.getLogger('werkzeug').addHandler(handler)
+logging.getLogger('src.common').addHandler(handler)
 
-DEFAULT_DATA = {
-    "duty_roster": [],
-    "class_schedules": [],
-    "birthdays": [],
-    "messages": ["Akıllı Okul Panosu Sistemine Hoşgeldiniz"],
-    "quotes": ["Kitap okumayı unutmayın."],
-    "school_name": "OKUL ADI",
-    "logo_url": "",
-    "slideshow": {
-        "duration": 5000,
-        "transition": "fade",
-        "order": "newest",
-        "fit_mode": "contain"
-    },
-    "performance_mode": "high",
-    "countdown": {
-        "label": "Geri Sayım",
-        "target_date": ""
-    },
-    "layout": [
-        {"id": "card-status", "title": "Durum", "visible": True, "type": "status"},
-        {"id": "card-duty", "title": "Nöbetçi Öğretmenler", "visible": True, "type": "duty"},
-        {"id": "card-quote", "title": "Günün Sözü", "visible": True, "type": "quote"},
-        {"id": "card-countdown", "title": "Geri Sayım", "visible": True, "type": "countdown"},
-        {"id": "card-birthdays", "title": "Doğum Günleri", "visible": True, "type": "birthdays"},
-        {"id": "card-classes", "title": "Sınıf Durumları", "visible": True, "type": "classes"},
-        {"id": "card-riddle", "title": "Bilmece/Soru", "visible": True, "type": "riddle"}
-    ],
-    "schedule": [],
-    "marquee": {
-        "font_size": "1.2",
-        "duration": "30",
-        "color": "#2c3e50",
-        "font_family": "inherit"
-    }
-}
+# Current time source; benchmarks replace it to replay a school day minute by minute
+clock = datetime.now
 
-def load_data():
-    data = copy.deepcopy(DEFAULT_DATA)
-    if os.path.exists(config.DATA_FILE):
-        try:
-            with open(config.DATA_FILE, 'r', encoding='utf-8') as f:
-                loaded = json.load(f)
-                # Simple merge for top-level keys
-                for k, v in loaded.items():
-                    if isinstance(v, dict) and k in data and isinstance(data[k], dict):
-                        data[k].update(v)
-                    else:
-                        data[k] = v
-        except Exception as e:
-            app.logger.error(f"Error loading data.json: {e}")
-    
-    # Migration: Ensure new cards exist in layout
-    existing_ids = [item.get('id') for item in data.get('layout', [])]
-    if 'card-riddle' not in existing_ids:
-        data['layout'].append({"id": "card-riddle", "title": "Bilmece/Soru", "visible": True, "type": "riddle"})
-    
-    return data
+# data.json fields index.html uses; other changes (birthdays, roster...) keep the cached page
+INDEX_FIELDS = ('school_name', 'logo_url', 'layout', 'performance_mode', 'marquee', 'messages')
+TEMPLATES = ('index.html', 'admin.html', 'admin_login.html')
+
+def _index_signature(data):
+    fields = {key: data.get(key) for key in INDEX_FIELDS}
+    return hashlib.sha1(json.dumps(fields, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()[:16]
 
-def save_data(data):
-    # Ensure directory exists before saving (double check)
-    os.makedirs(os.path.dirname(config.DATA_FILE), exist_ok=True)
-    with open(config.DATA_FILE, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=4)
+def index_etag():
+    template = os.path.join(config.WEB_TEMPLATE_DIR, 'index.html')
+    template_stamp = int(os.path.getmtime(template)) if os.path.exists(template) else 0
+    return f"index-{store.derived('index_signature', _index_signature)}-{template_stamp:x}"
 
 @app.route('/')
 def index():
-    data = load_data()
+    etag = index_etag()
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(index_cache.get(etag, render_index), mimetype='text/html')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def render_index():
+    data = read_data()
     school_name = data.get('school_name', 'OKUL ADI')
     logo_url = data.get('logo_url', '')
     layout = data.get('layout', [])
-    return render_template('index.html', school_name=school_name, logo_url=logo_url, layout=layout, data=data)
+    return render_template('index.html', school_name=school_name, logo_url=logo_url, layout=layout, data=data).encode('utf-8')
+
+# Rendered kiosk page for the current index_etag()
+index_cache = SingleFlightCache()
+
+# Set once warm_up() has finished; /healthz reports ready from then on
+ready = threading.Event()
+started_at = time.monotonic()
+
+def warm_up():
+    """Compile the templates and fill the caches before the first kiosk asks for them."""
+    start = time.perf_counter()
+    for name in TEMPLATES:
+        app.jinja_env.get_template(name)
+    with app.test_request_context('/'):
+        index_cache.get(index_etag(), render_index)
+        # Parsed data.json, bell schedule and today's status table
+        build_status()
+        # First folder scans (manifest probes of unknown files) and the serialized lists
+        get_slides()
+        get_riddles()
+    app.logger.info(f"Templates compiled and caches warmed in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+@app.route('/healthz')
+def healthz():
+    """Readiness probe for the launcher: 200 once the caches are warm, 503 before."""
+    body = {'ready': ready.is_set(), 'uptime': round(time.monotonic() - started_at, 3)}
+    if not ready.is_set():
+        return jsonify(body), 503, {'Retry-After': '1', 'Cache-Control': 'no-store'}
+    return jsonify(body), 200, {'Cache-Control': 'no-store'}
 
 def rotate_roster(data):
     """
@@ -271,9 +278,11 @@ def handle_save_settings(data):
         'font_family': request.form.get('marquee_font_family', "'Roboto', sans-serif")
     }
 
-    # Class Schedules Processing (Shortened for brevity, assume same logic as before or re-include)
+    # Class Schedules Processing: every class_name_<i> field posted, however many classes there are
     processed_schedules = []
-    for i in range(50):
+    class_indexes = sorted(int(key[len('class_name_'):]) for key in request.form
+                           if key.startswith('class_name_') and key[len('class_name_'):].isdigit())
+    for i in class_indexes:
         name_key = f'class_name_{i}'
         if name_key in request.form:
             c_name = request.form[name_key]
@@ -350,9 +359,8 @@ def handle_save_settings(data):
     if 'duty_rotation' not in data: data['duty_rotation'] = {}
     data['duty_rotation']['auto_rotate'] = request.form.get('auto_rotate') == 'on'
     if data['duty_rotation']['auto_rotate'] and data['duty_rotation'].get('last_week_number', 0) == 0:
-        data['duty_rotation']['last_week_number'] = datetime.now().isocalendar()[1]
+        data['duty_rotation']['last_week_number'] = clock().isocalendar()[1]
 
-    save_data(data)
     return "Ayarlar başarıyla kaydedildi!"
 
 @app.route('/admin/login', methods=['GET', 'POST'])
@@ -363,7 +371,7 @@ def admin_login():
     if request.method == 'POST':
         password = request.form.get('password', '')
         # Check password from data.json or env
-        data = load_data()
+        data = read_data()
         admin_pass = data.get('admin_password', ADMIN_PASSWORD)
         if password == admin_pass:
             session['admin_logged_in'] = True
@@ -381,101 +389,22 @@ def admin_logout():
 def admin():
     if not session.get('admin_logged_in'):
         return redirect(url_for('admin_login'))
-    data = load_data()
     message = None
 
     if request.method == 'POST':
         action = request.form.get('action')
-        
-        if action == 'rotate_now':
-            rotate_roster(data)
-            save_data(data)
-            message = "Nöbetler döndürüldü."
-        
-             
-        elif action == 'add_birthday':
-            name = request.form.get('birthday_name')
-            date_str = request.form.get('birthday_date')
-            if name and date_str:
-                if 'birthdays' not in data: data['birthdays'] = []
-                data['birthdays'].append({'name': name, 'date': date_str})
-                save_data(data)
-                message = "Doğum günü eklendi."
-                
-        elif action == 'delete_birthday':
-            name = request.form.get('delete_birthday_name')
-            date_str = request.form.get('delete_birthday_date')
-            if 'birthdays' in data:
-                data['birthdays'] = [b for b in data['birthdays'] if not (b['name'] == name and b['date'] == date_str)]
-                save_data(data)
-                message = "Doğum günü silindi."
-
-        elif action == 'import_birthdays':
-            if 'birthday_file' in request.files:
-                file = request.files['birthday_file']
-                if file.filename != '':
-                    try:
-                        df = pd.read_excel(file)
-                        # Heuristic: Find columns
-                        name_col = None
-                        surname_col = None
-                        date_col = None
-                        
-                        for col in df.columns:
-                            c_lower = str(col).lower()
-                            if "ad" in c_lower and "soyad" in c_lower:
-                                name_col = col
-                            elif "ad" in c_lower and not name_col:
-                                name_col = col
-                            elif "soyad" in c_lower:
-                                surname_col = col
-                            if "doğum" in c_lower and "tarih" in c_lower:
-                                date_col = col
-                        
-                        if 'birthdays' not in data: data['birthdays'] = []
-                        added_count = 0
-                        
-                        if (name_col or (name_col and surname_col)) and date_col:
-                            for index, row in df.iterrows():
-                                try:
-                                    full_name = ""
-                                    if surname_col and name_col:
-                                        full_name = f"{row[name_col]} {row[surname_col]}".strip()
-                                    elif name_col:
-                                        full_name = str(row[name_col]).strip()
-                                    
-                                    d = row[date_col]
-                                    date_formatted = ""
-                                    if isinstance(d, datetime):
-                                        date_formatted = d.strftime("%d.%m")
-                                    else:
-                                        d_str = str(d).replace('/', '.')
-                                        parts = d_str.split('.')
-                                        if len(parts) >= 2:
-                                            # Assuming DD.MM.YYYY or similar
-                                            date_formatted = f"{parts[0].zfill(2)}.{parts[1].zfill(2)}"
-                                    
-                                    if date_formatted and not any(b['name'] == full_name and b['date'] == date_formatted for b in data['birthdays']):
-                                        data['birthdays'].append({'name': full_name, 'date': date_formatted})
-                                        added_count += 1
-                                except Exception:
-                                    continue
-                            
-                            save_data(data)
-                            message = f"{added_count} kişi eklendi."
-                        else:
-                            message = "Sütunlar bulunamadı (Adı Soyadı, Doğum Tarihi)."
-                    except Exception as e:
-                        message = f"Hata: {str(e)}"
-        
-        elif action == 'save_settings' or action is None:
-            try:
-                message = handle_save_settings(data)
-            except Exception as e:
-                app.logger.error(f"Error saving settings: {e}")
-                app.logger.error(traceback.format_exc())
-                message = f"Hata oluştu: {str(e)}"
+        try:
+            upload, message = read_admin_upload(action)
+            if message is None:
+                # Runs under the data.json write lock; nothing is written if it raises
+                message = update_data(lambda data: handle_admin_action(action, data, upload))
+                bus.publish(bus.DATA, source='admin')
+        except Exception as e:
+            app.logger.error(f"Error saving settings: {e}")
+            app.logger.error(traceback.format_exc())
+            message = f"Hata oluştu: {str(e)}"
 
+    data = read_data()
     # Prepare env data for admin panel
     env_data = {
         'bot_token': config.BOT_TOKEN,
@@ -484,16 +413,175 @@ def admin():
     }
     return render_template('admin.html', data=data, message=message, env_data=env_data)
 
-@app.route('/api/get_status')
-def get_status():
-    data = load_data()
-    now = datetime.now()
-    current_time_str = now.strftime("%H:%M")
-    # Get English day name safely (independent of locale)
-    day_names_en = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-    current_day_en = day_names_en[now.weekday()]
+# Per-row import errors listed in the admin message
+IMPORT_ERRORS_SHOWN = 10
+
+def read_admin_upload(action):
+    """
+    Parse the spreadsheet of an import action before the data.json write lock is
+    taken, so a large sheet does not hold up the bot's writes meanwhile.
+    Returns (parsed upload or None, error message or None).
+    """
+    if action == 'import_birthdays':
+        file = request.files.get('birthday_file')
+        if not file or file.filename == '':
+            return None, None
+        rows, errors = [], []
+        try:
+            for row_number, name, date_formatted, error in read_birthdays(file.stream, file.filename):
+                if error:
+                    errors.append(f"Satır {row_number}: {error}")
+                else:
+                    rows.append((name, date_formatted))
+        except SpreadsheetError as e:
+            return None, f"Hata: {e}"
+        return (rows, errors), None
+    if action in TIMETABLE_IMPORTS:
+        return read_timetable_file(action)
+    return None, None
+
+def handle_admin_action(action, data, upload=None):
+    """
+    Apply one admin form action to data (a private copy) and return the user message.
+    upload is what read_admin_upload() parsed for the action.
+    """
+    message = None
+    if action == 'rotate_now':
+        rotate_roster(data)
+        message = "Nöbetler döndürüldü."
+
+    elif action == 'add_birthday':
+        name = request.form.get('birthday_name')
+        date_str = request.form.get('birthday_date')
+        if name and date_str:
+            if 'birthdays' not in data: data['birthdays'] = []
+            data['birthdays'].append({'name': name, 'date': date_str})
+            message = "Doğum günü eklendi."
+            
+    elif action == 'delete_birthday':
+        name = request.form.get('delete_birthday_name')
+        date_str = request.form.get('delete_birthday_date')
+        if 'birthdays' in data:
+            data['birthdays'] = [b for b in data['birthdays'] if not (b['name'] == name and b['date'] == date_str)]
+            message = "Doğum günü silindi."
+
+    elif action == 'import_birthdays':
+        if upload is not None:
+            rows, errors = upload
+            if 'birthdays' not in data: data['birthdays'] = []
+            # Hash set of existing entries: dedupe is O(1) per row
+            known = {entry_key(b.get('name', ''), b.get('date', '')) for b in data['birthdays']}
+            added_count = 0
+            skipped_count = 0
+            for name, date_formatted in rows:
+                key = entry_key(name, date_formatted)
+                if key in known:
+                    skipped_count += 1
+                    continue
+                known.add(key)
+                data['birthdays'].append({'name': name, 'date': date_formatted})
+                added_count += 1
+
+            message = f"{added_count} kişi eklendi."
+            if skipped_count:
+                message += f" {skipped_count} kişi zaten kayıtlıydı."
+            if errors:
+                message += f" {format_import_errors(errors)}"
     
-    # Auto-Rotation Check
+    elif action in TIMETABLE_IMPORTS:
+        field, _, merge, noun = TIMETABLE_IMPORTS[action]
+        result = merge(data, upload, replace=request.form.get(f'{field}_replace') == 'on')
+        message = result.summary(noun)
+
+    elif action == 'save_settings' or action is None:
+        message = handle_save_settings(data)
+
+    return message
+
+def format_import_errors(errors):
+    shown = "; ".join(errors[:IMPORT_ERRORS_SHOWN])
+    more = f" (+{len(errors) - IMPORT_ERRORS_SHOWN} satır daha)" if len(errors) > IMPORT_ERRORS_SHOWN else ""
+    return f"{len(errors)} satır okunamadı: {shown}{more}"
+
+# Bulk import of class_schedules / duty_roster: action -> (form field, read, merge, noun)
+TIMETABLE_IMPORTS = {
+    'import_timetable': ('timetable_file', timetable.read_timetable, timetable.merge_timetable, 'sınıf'),
+    'import_roster': ('roster_file', timetable.read_roster, timetable.merge_roster, 'nöbet yeri'),
+}
+
+def read_timetable_file(action):
+    """
+    Read and validate a timetable / roster upload: (entries, None), or (None, message).
+    All-or-nothing: any bad row and nothing is changed.
+    """
+    field, read, _, _ = TIMETABLE_IMPORTS[action]
+    file = request.files.get(field)
+    if not file or file.filename == '':
+        return None, "Hata: Dosya seçilmedi."
+    try:
+        entries, errors = read(file.stream, file.filename)
+    except SpreadsheetError as e:
+        return None, f"Hata: {e}"
+    if errors:
+        return None, f"Hata: Hiçbir değişiklik yapılmadı. {format_import_errors(errors)}"
+    if not entries:
+        return None, "Hata: Dosyada kayıt bulunamadı."
+    return entries, None
+
+EXPORTS = {
+    'timetable': ('Ders Programı', timetable.timetable_rows),
+    'roster': ('Nöbet Çizelgesi', timetable.roster_rows),
+}
+
+@app.route('/admin/export/<kind>.<fmt>')
+def admin_export(kind, fmt):
+    """Timetable / duty roster download in the same layout the bulk import reads."""
+    if not session.get('admin_logged_in'):
+        return redirect(url_for('admin_login'))
+    if kind not in EXPORTS or fmt not in ('xlsx', 'csv'):
+        abort(404)
+    title, build_rows = EXPORTS[kind]
+    rows = build_rows(read_data())
+    if fmt == 'csv':
+        body, mimetype = timetable.write_csv(rows), 'text/csv'
+    else:
+        body = timetable.write_xlsx(rows, title)
+        mimetype = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    response = Response(body, mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{kind}.{fmt}"'
+    return response
+
+def conditional_json(etag, build, cache=None):
+    """
+    JSON response with a strong ETag. If the client already has this ETag we answer
+    304 without calling build() at all. With a SingleFlightCache the serialized
+    body is reused by every request for the same ETag.
+    """
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    elif cache is not None:
+        body = cache.get(etag, lambda: jsonify(build()).get_data())
+        response = Response(body, mimetype=app.json.mimetype)
+    else:
+        response = jsonify(build())
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def check_auto_rotation(now):
+    """Rotate the duty roster once per ISO week if enabled."""
+    rotation_settings = read_data().get('duty_rotation', {})
+    if not rotation_settings.get('auto_rotate'):
+        return
+    if rotation_settings.get('last_week_number', 0) == now.isocalendar()[1]:
+        return
+    try:
+        update_data(lambda data: rotate_if_due(data, now))
+    except DataStoreError as e:
+        app.logger.error(f"Auto rotation skipped: {e}")
+
+def rotate_if_due(data, now):
+    # Re-checked under the write lock so the web and bot processes never rotate twice
     current_iso_week = now.isocalendar()[1]
     rotation_settings = data.get('duty_rotation', {})
     last_week = rotation_settings.get('last_week_number', 0)
@@ -507,17 +595,31 @@ def get_status():
         # Let's assume initialized last_week is set when setting is ENABLED.
         # But for now, if last_week != current_week, rotate.
         if last_week != 0 and current_iso_week != last_week:
-             # Perform rotation
              rotate_roster(data)
              data['duty_rotation']['last_week_number'] = current_iso_week
-             save_data(data)
-             # Reload data to reflect changes immediately in this response
-             # Actually 'data' object is updated in memory, so valid for this request.
         elif last_week == 0:
              # First initialization
              data['duty_rotation']['last_week_number'] = current_iso_week
-             save_data(data)
 
+@app.route('/api/get_status')
+def get_status():
+    now = clock()
+    check_auto_rotation(now)
+    # Payload depends only on data.json and the current minute
+    etag = f"status-{store.etag}-{now:%Y%m%d%H%M}"
+    return conditional_json(etag, lambda: build_status(now), cache=status_cache)
+
+# Serialized get_status body for the current (data version, minute)
+status_cache = SingleFlightCache()
+
+def build_status(now=None):
+    if now is None:
+        now = clock()
+    data = read_data()
+    current_time_str = now.strftime("%H:%M")
+    # Get English day name safely (independent of locale)
+    day_names_en = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+    current_day_en = day_names_en[now.weekday()]
     
     # Translate day name for display
     days_map = {
@@ -526,122 +628,26 @@ def get_status():
     }
     current_day_tr = days_map.get(current_day_en, current_day_en)
         
-    # Find duty teachers for today from Roster
-    duty_list = []
-    
-    roster = data.get('duty_roster', [])
-    for item in roster:
-        teacher = item.get('schedule', {}).get(current_day_en, '')
-        if teacher:
-            duty_list.append(f"{item['location']}: {teacher}")
-            
-
+    # Duty list and class lesson strings come from the per-day table
+    # (built once per data version and weekday)
+    day_table = get_day_table(current_day_en)
 
     # Find current lesson/status AND current lesson index for classes
-    current_status = "Ders Dışı"
-    current_lesson_index = -1 # -1 means no lesson (break or off)
-    current_time = datetime.strptime(current_time_str, "%H:%M")
-    
-    schedule = data.get('schedule', [])
-    if isinstance(schedule, dict):
-         schedule_list = []
-         for k, v in schedule.items():
-            schedule_list.append({'name': k, 'start': v['start'], 'end': v['end']})
-         schedule = schedule_list
-
-    for index, item in enumerate(schedule):
-        try:
-            start_time = datetime.strptime(item['start'], "%H:%M")
-            end_time = datetime.strptime(item['end'], "%H:%M")
-            
-            if start_time <= current_time <= end_time:
-                current_status = item['name']
-                # Check if this item name represents a lesson (contains "Ders") or logic mapping
-                # Assuming "1. Ders" -> index 0, "2. Ders" -> index 1.
-                # However, breaks are also in schedule. We only want to count "Lessons".
-                # A heuristic: if it's "Öğle Arası", index is -1.
-                if "Ders" in item['name']:
-                    # We need to find which "Ders" it is.
-                    # Or simpler: count how many items BEFORE this one had "Ders" in name.
-                    pass
-                break
-        except (ValueError, KeyError):
-            continue
-            
-    # Calculate lesson index properly
-    # We iterate again to find the index of the CURRENT lesson among all lessons.
-    lesson_count = 0
-    calculated_index = -1
-    for item in schedule:
-        try:
-            s = datetime.strptime(item['start'], "%H:%M")
-            e = datetime.strptime(item['end'], "%H:%M")
-            # If it's a lesson (heuristic: not "Arası")
-            if "Ders" in item.get('name', '') or "Etüt" in item.get('name', ''):
-                if s <= current_time <= e:
-                    calculated_index = lesson_count
-                lesson_count += 1
-        except (ValueError, KeyError):
-            pass
-    
-    current_lesson_index = calculated_index
-
-    # Get Class Status
-    class_status_list = []
-    is_lesson = current_lesson_index != -1
-    lesson_number = 0
-    
-    if is_lesson and current_day_en in ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']:
-        lesson_number = current_lesson_index + 1  # 1-based
-        classes = data.get('class_schedules', [])
-        for cls in classes:
-            prog = cls.get('program', {}).get(current_day_en, [])
-            if current_lesson_index < len(prog):
-                lesson_name = prog[current_lesson_index]
-                if lesson_name:
-                    class_status_list.append(f"{cls['name']}: {lesson_name}")
-
-    # Get NEXT lesson classes (for break time display)
-    next_class_status_list = []
-    next_lesson_index = -1
-    
-    if not is_lesson and current_day_en in ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']:
-        # Find the next lesson index
-        next_lesson_count = 0
-        for item in schedule:
-            try:
-                s = datetime.strptime(item['start'], "%H:%M")
-                if "Ders" in item.get('name', '') or "Etüt" in item.get('name', ''):
-                    if s > current_time:
-                        next_lesson_index = next_lesson_count
-                        break
-                    next_lesson_count += 1
-            except (ValueError, KeyError):
-                continue
-        
-        if next_lesson_index != -1:
-            classes = data.get('class_schedules', [])
-            for cls in classes:
-                prog = cls.get('program', {}).get(current_day_en, [])
-                if next_lesson_index < len(prog):
-                    lesson_name = prog[next_lesson_index]
-                    if lesson_name:
-                        next_class_status_list.append(f"{cls['name']}: {lesson_name}")
+    # (compiled once per data version, lookup is a bisect)
+    slot_state = get_compiled_schedule().at_time(now)
+    current_status = slot_state.slot.name if slot_state.slot else "Ders Dışı"
+    is_lesson = slot_state.lesson_index != -1 # -1 means no lesson (break or off)
+    lesson_number = slot_state.lesson_index + 1 if is_lesson and current_day_en in SCHOOL_DAYS else 0  # 1-based
+    class_status_list, next_class_status_list = day_table.for_slot(slot_state)
 
     # Birthdays
-    todays_birthdays = []
-    today_str = now.strftime("%d.%m")
-    if 'birthdays' in data:
-        for b in data['birthdays']:
-            b_date = b.get('date', '')
-            if b_date.startswith(today_str):
-                todays_birthdays.append(b['name'])
-
-    return jsonify({
+    todays_birthdays = get_birthday_index().on(now)
+
+    return {
         "status": current_status,
         "is_lesson": is_lesson,
         "lesson_number": lesson_number,
-        "duty_teachers": duty_list,
+        "duty_teachers": day_table.duty_teachers,
         "class_statuses": class_status_list,
         "next_class_statuses": next_class_status_list,
         "birthdays": todays_birthdays,
@@ -653,7 +659,7 @@ def get_status():
         "quotes": data.get('quotes', []),
         "countdown": data.get('countdown', {}),
         "slideshow": data.get('slideshow', {}) 
-    })
+    }
 
 @app.route('/api/open_slides_folder')
 def open_slides_folder():
@@ -727,32 +733,36 @@ def get_autostart_status():
 
 @app.route('/api/get_slides')
 def get_slides():
-    slides = []
-    if os.path.exists(config.SLIDESHOW_DIR):
-        valid_exts = ['.jpg', '.jpeg', '.png', '.gif', '.mp4', '.webm']
-        files = []
-        for f in os.listdir(config.SLIDESHOW_DIR):
-            ext = os.path.splitext(f)[1].lower()
-            if ext in valid_exts:
-                full_path = os.path.join(config.SLIDESHOW_DIR, f)
-                files.append({'name': f, 'mtime': os.path.getmtime(full_path)})
-        
-        # Sort based on config
-        data = load_data()
-        order = data.get('slideshow', {}).get('order', 'newest')
-        
-        if order == 'newest':
-            files.sort(key=lambda x: x['mtime'], reverse=True)
-        elif order == 'oldest':
-            files.sort(key=lambda x: x['mtime'])
-        elif order == 'random':
-            import random
-            random.shuffle(files)
-        # else name sort? default os.listdir is arbitrary/name usually.
-            
-        slides = [f['name'] for f in files]
-        
-    return jsonify(slides)
+    # Sort order comes from data.json, the file list from the folder
+    etag = f"slides-{store.etag}-{slides_index.signature}"
+    return conditional_json(etag, build_slides, cache=slides_cache)
+
+# Serialized get_slides / riddles bodies (one manifest item per file) for the current listing
+slides_cache = SingleFlightCache()
+riddles_cache = SingleFlightCache()
+
+def media_item(kind, entry):
+    """What the kiosk needs to show a slide / riddle, straight from the media manifest."""
+    return {
+        'name': entry.name,
+        'url': url_for('media_file', kind=kind, name=entry.name),
+        'kind': entry.kind,
+        'mime': entry.mime,
+        'width': entry.width,
+        'height': entry.height,
+        'duration': entry.duration,
+    }
+
+def build_slides():
+    # Sort based on config
+    order = read_data().get('slideshow', {}).get('order', 'newest')
+    if order == 'oldest':
+        return slides_index.derived('oldest', lambda entries: [media_item('slideshow', e) for e in sorted(entries, key=lambda e: e.mtime)])
+    if order == 'random':
+        slides = list(slides_index.derived('items', lambda entries: [media_item('slideshow', e) for e in entries]))
+        random.shuffle(slides)
+        return slides
+    return slides_index.derived('newest', lambda entries: [media_item('slideshow', e) for e in sorted(entries, key=lambda e: e.mtime, reverse=True)])
 
 @app.route('/api/delete_slide', methods=['POST'])
 def delete_slide():
@@ -767,48 +777,285 @@ def delete_slide():
         
         if os.path.exists(file_path):
             os.remove(file_path)
+            thumbnails.remove_thumbnail(safe_name)
+            manifest.remove(config.SLIDESHOW_DIR, safe_name)
+            bus.publish(bus.SLIDES, removed=safe_name)
             return jsonify({'status': 'success', 'message': f'{safe_name} silindi.'})
         else:
             return jsonify({'status': 'error', 'message': 'Dosya bulunamadı.'})
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)})
 
+# Admin gallery sort modes: key function and reverse flag
+# sort -> (field of the slide info the list is ordered by, descending); ties are name-descending
+SLIDE_SORTS = {
+    'newest': ('timestamp', True),
+    'oldest': ('timestamp', False),
+    'name_asc': ('name', False),
+    'name_desc': ('name', True),
+    'type': ('type', False),
+}
+
+def encode_slides_cursor(sort, slide):
+    """Opaque paging cursor: the sort and the (sort key, name) of the last item sent."""
+    field, _ = SLIDE_SORTS[sort]
+    raw = json.dumps([sort, slide[field], slide['name']], ensure_ascii=False)
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_slides_cursor(cursor, sort):
+    """(sort key, name) from a cursor made for `sort`; None if it is not one."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        cursor_sort, key, name = json.loads(raw)
+    except (ValueError, TypeError):
+        return None
+    if cursor_sort != sort or not isinstance(name, str):
+        return None
+    return key, name
+
+def slides_after(positions, sort, key, name):
+    """
+    Index of the first slide ordered after (key, name), whether or not that slide
+    still exists. positions: (sort key, name) of every slide, in list order.
+    """
+    _, descending = SLIDE_SORTS[sort]
+    # Binary search; the mixed order (key either way, name descending) fits no plain bisect
+    lo, hi = 0, len(positions)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        mid_key, mid_name = positions[mid]
+        if mid_key != key:
+            after = mid_key < key if descending else mid_key > key
+        else:
+            after = mid_name < name
+        if after:
+            hi = mid
+        else:
+            lo = mid + 1
+    return lo
+
 @app.route('/api/get_slides_with_info')
 def get_slides_with_info():
-    """Returns slide list with thumbnail info for admin panel."""
+    """
+    Returns slide list with thumbnail info for admin panel.
+    Without paging parameters the whole list is returned (legacy). With sort/limit/
+    offset/cursor a page is returned: {"items", "total", "next_cursor"}.
+    """
+    sort = request.args.get('sort', 'name_desc')
+    if sort not in SLIDE_SORTS:
+        sort = 'name_desc'
+    slides, positions = slides_index.derived(f'info:{sort}', lambda entries: build_slides_info(entries, sort))
+
+    if not any(k in request.args for k in ('sort', 'limit', 'offset', 'cursor')):
+        return jsonify(slides)
+
+    limit = min(max(request.args.get('limit', 60, type=int), 1), 500)
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    cursor = request.args.get('cursor')
+    if cursor:
+        position = decode_slides_cursor(cursor, sort)
+        if position is None:
+            abort(400)
+        # Continue right after the last item the client has, even if it was deleted meanwhile
+        key, name = position
+        try:
+            offset = slides_after(positions, sort, key, name)
+        except TypeError:
+            abort(400)  # Key of the wrong type for this sort
+
+    items = slides[offset:offset + limit]
+    next_cursor = encode_slides_cursor(sort, items[-1]) if offset + limit < len(slides) and items else None
+    return jsonify({'items': items, 'total': len(slides), 'next_cursor': next_cursor})
+
+def build_slides_info(entries, sort):
+    field, descending = SLIDE_SORTS[sort]
     slides = []
-    if os.path.exists(config.SLIDESHOW_DIR):
-        valid_exts = ['.jpg', '.jpeg', '.png', '.gif', '.mp4', '.webm']
-        for f in sorted(os.listdir(config.SLIDESHOW_DIR), reverse=True):
-            ext = os.path.splitext(f)[1].lower()
-            if ext in valid_exts:
-                full_path = os.path.join(config.SLIDESHOW_DIR, f)
-                size_kb = os.path.getsize(full_path) / 1024
-                mtime = os.path.getmtime(full_path)
-                dt = datetime.fromtimestamp(mtime)
-                
-                slides.append({
-                    'name': f,
-                    'size': f"{size_kb:.0f} KB",
-                    'type': 'image' if ext in ['.jpg', '.jpeg', '.png', '.gif'] else 'video',
-                    'timestamp': mtime,
-                    'date_str': dt.strftime("%d.%m.%Y %H:%M"),
-                    'url': url_for('static', filename=f'slideshow/{f}')
-                })
-    return jsonify(slides)
+    # Name-descending base order keeps ties (e.g. sort by type) stable
+    for entry in sorted(entries, key=lambda e: e.name, reverse=True):
+        dt = datetime.fromtimestamp(entry.mtime)
+        slides.append({
+            'name': entry.name,
+            'size': f"{entry.size / 1024:.0f} KB",
+            'type': entry.kind,
+            'mime': entry.mime,
+            'width': entry.width,
+            'height': entry.height,
+            'duration': entry.duration,
+            'bytes': entry.size,
+            'sha256': entry.sha256,
+            'uploader': entry.uploader,
+            'timestamp': entry.mtime,
+            'date_str': dt.strftime("%d.%m.%Y %H:%M"),
+            'url': url_for('media_file', kind='slideshow', name=entry.name),
+            'thumb': url_for('media_thumbnail', name=entry.name)
+        })
+    if sort != 'name_desc':
+        slides.sort(key=lambda s: s[field], reverse=descending)
+    # Cursor lookups (slides_after) compare these instead of rebuilding them per call
+    positions = [(s[field], s['name']) for s in slides]
+    return slides, positions
+
+# Media names are uuids and never change, so media and thumbnails can be cached "forever"
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+MEDIA_FOLDERS = {
+    'slideshow': (config.SLIDESHOW_DIR, slides_index),
+    'riddles': (config.RIDDLES_DIR, riddles_index),
+}
+
+def send_immutable(directory, name):
+    # Conditional + Range (206) handling comes from send_file; the pooled server sends the body with sendfile()
+    response = send_from_directory(directory, name, max_age=IMMUTABLE_MAX_AGE, conditional=True)
+    response.headers['Cache-Control'] = f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+    return response
+
+@app.route('/media/<kind>/<name>')
+def media_file(kind, name):
+    """Slide / riddle file, so kiosks fetch each video once instead of on every loop."""
+    if kind not in MEDIA_FOLDERS:
+        abort(404)
+    directory, index = MEDIA_FOLDERS[kind]
+    # Only files the index knows (skips .part files and anything else in the folder)
+    if index.get(name) is None:
+        abort(404)
+    return send_immutable(directory, name)
+
+@app.route('/media/thumbs/<name>')
+def media_thumbnail(name):
+    """Thumbnail / video poster for a slide or riddle, generated on first request if missing."""
+    name = os.path.basename(name)
+    if slides_index.get(name):
+        src_dir = config.SLIDESHOW_DIR
+    elif riddles_index.get(name):
+        src_dir = config.RIDDLES_DIR
+    else:
+        abort(404)
+    if not os.path.exists(thumbnails.thumbnail_path(name)):
+        if thumbnails.make_thumbnail(os.path.join(src_dir, name)) is None:
+            abort(404)
+    return send_immutable(config.THUMBNAIL_DIR, thumbnails.thumbnail_name(name))
 
 
 @app.route('/api/riddles')
 def get_riddles():
-    """Returns list of riddle images."""
-    riddles = []
-    if os.path.exists(config.RIDDLES_DIR):
-        valid_exts = ['.jpg', '.jpeg', '.png', '.gif', '.webp']
-        for f in sorted(os.listdir(config.RIDDLES_DIR)):
-            ext = os.path.splitext(f)[1].lower()
-            if ext in valid_exts:
-                riddles.append(url_for('static', filename=f'riddles/{f}'))
-    return jsonify(riddles)
+    """Returns list of riddle media items."""
+    etag = f"riddles-{riddles_index.signature}"
+    return conditional_json(etag, build_riddles, cache=riddles_cache)
+
+def build_riddles():
+    return riddles_index.derived('items', lambda entries: [
+        media_item('riddles', e) for e in sorted(entries, key=lambda e: e.name)
+    ])
+
+# --- Live Updates (SSE) ---
+
+def _status_signature():
+    # Status only changes with data.json, the bell schedule slot or the date
+    # Read-only: it runs on the stream hub thread (rotation has its own timer)
+    now = clock()
+    return (store.etag, now.date(), get_compiled_schedule().at_time(now))
+
+def _slides_signature():
+    return (slides_index.signature, read_data().get('slideshow', {}).get('order'))
+
+STREAM_BUILDERS = {
+    'status': build_status,
+    'slides': build_slides,
+    'riddles': build_riddles,
+}
+
+def render_stream_event(name):
+    # Runs on the hub thread; url_for in the builders needs a request context
+    with app.test_request_context('/'):
+        return STREAM_BUILDERS[name]()
+
+stream_hub = StreamHub(render_stream_event, max_clients=config.STREAM_MAX_CLIENTS,
+                       heartbeat=config.STREAM_HEARTBEAT)
+stream_hub.add_source('status', _status_signature)
+stream_hub.add_source('slides', _slides_signature)
+stream_hub.add_source('riddles', lambda: riddles_index.signature)
+
+# Kiosk streams to push right away for each change bus topic
+BUS_STREAMS = {
+    bus.MESSAGES: ('status',),
+    bus.QUOTES: ('status',),
+    bus.DATA: ('status', 'slides'),
+    bus.SLIDES: ('slides',),
+    bus.RIDDLES: ('riddles',),
+}
+
+def on_change(event):
+    """Change bus subscriber: drop the affected caches and notify connected kiosks."""
+    if event.topic == bus.SLIDES:
+        slides_index.invalidate()
+    elif event.topic == bus.RIDDLES:
+        riddles_index.invalidate()
+    else:
+        # Two writes within the same mtime tick would otherwise go unnoticed
+        store.invalidate()
+    for name in BUS_STREAMS.get(event.topic, ()):
+        stream_hub.refresh(name)
+
+bus.subscribe(on_change)
+
+@app.route('/api/stream')
+def stream():
+    """Pushes status/slides/riddles to the kiosk when they change."""
+    # The pooled server hands the connection to stream_hub once the headers are
+    # out, so an open stream holds no worker thread. Flask's development server
+    # cannot do that: kiosks poll instead.
+    detach = request.environ.get(DETACH_KEY)
+    if detach is None or not stream_hub.accepting():
+        return Response("Live updates unavailable", status=503, headers={'Retry-After': '30'})
+    detach(stream_hub.attach)
+    # Empty iterator, not an empty list: no Content-Length, the hub writes the body
+    return Response(iter(()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+def _warm_up_in_background():
+    try:
+        warm_up()
+    except Exception as e:
+        # A cold cache only makes the first requests slower; never keep the kiosk waiting on it
+        app.logger.error(f"Warm-up failed: {e}")
+    finally:
+        ready.set()
+
+# Kiosks on the live stream no longer poll get_status, so the weekly roster
+# rotation is also checked on a timer, never on the stream hub thread
+ROTATION_CHECK_INTERVAL = 60  # seconds
+rotation_stopped = threading.Event()
+
+def _rotation_timer():
+    while not rotation_stopped.wait(ROTATION_CHECK_INTERVAL):
+        try:
+            check_auto_rotation(clock())
+        except Exception as e:
+            app.logger.error(f"Auto rotation check failed: {e}")
+
+def prepare_serving():
+    """
+    Start warming the caches in the background (/healthz answers 503 until done),
+    the roster rotation timer, and receiving change events from a separate bot process.
+    Call it once the port is bound, so the launcher sees the warm-up progress.
+    """
+    threading.Thread(target=_warm_up_in_background, name="warm-up", daemon=True).start()
+    threading.Thread(target=_rotation_timer, name="rotation", daemon=True).start()
+    bus.listen()
+
+def create_web_server(host='0.0.0.0', port=config.WEB_PORT):
+    """Pooled production server (SSE streams are detached from its workers)."""
+    from src.web.server import create_server
+    server = create_server(app, host, port,
+                           threads=config.WEB_THREADS,
+                           keepalive_timeout=config.WEB_KEEPALIVE_TIMEOUT,
+                           io_timeout=config.WEB_IO_TIMEOUT,
+                           on_shutdown=[stream_hub.close, rotation_stopped.set, bus.close])
+    prepare_serving()
+    return server
 
 if __name__ == '__main__':
+    # Only in the reloader's serving child, not in the parent that watches files
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        prepare_serving()
     app.run(host='0.0.0.0', port=config.WEB_PORT, debug=True)
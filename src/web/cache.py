@@ -0,0 +1,28 @@
+"""
+Response caches for the endpoints every kiosk polls.
+"""
+import threading
+
+
+class SingleFlightCache:
+    """
+    Keeps the value for the most recent key. When many requests miss at the same
+    time (every kiosk polls right after the minute changes) only the first one
+    builds the value, the others wait for it and reuse the result.
+    """
+
+    def __init__(self):
+        self._entry = None  # (key, value); replaced as a whole, so reads need no lock
+        self._build_lock = threading.Lock()
+
+    def get(self, key, build):
+        entry = self._entry
+        if entry is not None and entry[0] == key:
+            return entry[1]
+        with self._build_lock:
+            entry = self._entry
+            if entry is not None and entry[0] == key:
+                return entry[1]
+            value = build()
+            self._entry = (key, value)
+            return value
@@ -0,0 +1,283 @@
+"""
+Pooled WSGI server used instead of Flask's development server.
+
+It is Werkzeug's BaseWSGIServer (same request handling as app.run) with:
+- a fixed pool of worker threads instead of one new thread per connection,
+- HTTP/1.1 keep-alive, idle connections closed after `keepalive_timeout`
+  (only the wait for the next request; a request being read or a response
+  being written may stall for up to `io_timeout`),
+- zero-copy socket.sendfile() for files returned by send_file/send_from_directory,
+- detach: a response can take its connection out of the pool (see DETACH_KEY),
+  so long-lived event streams do not hold a worker,
+- stop(): stops accepting, lets in-flight responses finish, then closes.
+
+Every other open connection occupies one worker while a request is running on
+it or while it waits (up to keepalive_timeout) for the next one.
+"""
+import logging
+import socket
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from werkzeug.exceptions import InternalServerError
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+from werkzeug.wsgi import LimitedStream
+
+logger = logging.getLogger(__name__)
+
+# environ[DETACH_KEY](callback): after the response headers are written, the
+# connection leaves the pool and callback(socket) owns it; the response body is
+# whatever the callback sends, until it closes the socket
+DETACH_KEY = 'pooled_server.detach'
+
+
+class SendfileWrapper:
+    """wsgi.file_wrapper that the server can recognize and hand to socket.sendfile()."""
+
+    def __init__(self, file, buffer_size=8192):
+        self.file = file
+        self.buffer_size = buffer_size
+
+    def seekable(self):
+        return self.file.seekable()
+
+    def seek(self, *args):
+        return self.file.seek(*args)
+
+    def tell(self):
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        data = self.file.read(self.buffer_size)
+        if data:
+            return data
+        raise StopIteration()
+
+
+def _sendfile_source(application_iter):
+    """(file, offset, count) if the response body is a plain file (or a Range of one)."""
+    if isinstance(application_iter, SendfileWrapper):
+        return application_iter.file, 0, None
+    # Range requests: werkzeug wraps the file wrapper in a (private) _RangeWrapper
+    inner = getattr(application_iter, 'iterable', None)
+    if isinstance(inner, SendfileWrapper) and hasattr(application_iter, 'start_byte'):
+        return inner.file, application_iter.start_byte, application_iter.byte_range
+    return None
+
+
+class KeepAliveRequestHandler(WSGIRequestHandler):
+    """
+    Werkzeug's handler always sends "Connection: close" and then discards
+    whatever the socket still has to read, which would eat the next request on
+    a kept-alive connection. This version bounds the request body by its
+    Content-Length and drains exactly that, so the connection can be reused.
+    """
+    protocol_version = "HTTP/1.1"
+    keepalive_timeout = 5  # Idle wait for the next request line
+    io_timeout = 300  # Anything else: request headers/body, response writes
+
+    def setup(self):
+        self.timeout = self.keepalive_timeout
+        super().setup()
+
+    def handle_one_request(self):
+        # Only the wait for the next request is bounded by the keep-alive timeout.
+        # Once it starts, pauses are normal (a kiosk <video> stops reading when it
+        # has buffered enough) and only io_timeout applies.
+        self.connection.settimeout(self.keepalive_timeout)
+        try:
+            if not self.rfile.peek(1):
+                self.close_connection = True
+                return
+        except (socket.timeout, ConnectionError):
+            self.close_connection = True  # Idle keep-alive connection
+            return
+        self.connection.settimeout(self.io_timeout)
+        super().handle_one_request()
+
+    def run_wsgi(self):
+        if self.headers.get("Expect", "").lower().strip() == "100-continue":
+            self.wfile.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+
+        environ = self.make_environ()
+        environ["wsgi.file_wrapper"] = SendfileWrapper
+        detach_callbacks = []
+        environ[DETACH_KEY] = detach_callbacks.append
+        body = None
+        keep_alive = not self.close_connection and not self.server.stopping
+        if environ.get("wsgi.input_terminated"):
+            keep_alive = False  # Chunked upload: simply close afterwards
+        else:
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+            except ValueError:
+                length = 0
+                keep_alive = False
+            body = environ["wsgi.input"] = LimitedStream(self.rfile, max(length, 0))
+
+        state = {"status": None, "headers": None, "sent": False, "chunked": False}
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info and state["sent"]:
+                raise exc_info[1].with_traceback(exc_info[2])
+            state["status"], state["headers"] = status, headers
+            return write
+
+        def write(data):
+            if not state["sent"]:
+                state["sent"] = True
+                code_str, _, msg = state["status"].partition(" ")
+                code = int(code_str)
+                self.send_response(code, msg)
+                header_keys = set()
+                for key, value in state["headers"]:
+                    self.send_header(key, value)
+                    header_keys.add(key.lower())
+                framed = ("content-length" in header_keys or environ["REQUEST_METHOD"] == "HEAD"
+                          or 100 <= code < 200 or code in (204, 304))
+                if not framed:
+                    if detach_callbacks:
+                        self.close_connection = True  # Raw body from the new owner until it closes
+                    elif self.request_version >= "HTTP/1.1":
+                        state["chunked"] = True
+                        self.send_header("Transfer-Encoding", "chunked")
+                    else:
+                        self.close_connection = True  # Body ends when the connection does
+                if not keep_alive or self.close_connection:
+                    self.send_header("Connection", "close")
+                self.end_headers()
+            if data:
+                if state["chunked"]:
+                    self.wfile.write(f"{len(data):x}\r\n".encode("ascii"))
+                    self.wfile.write(data)
+                    self.wfile.write(b"\r\n")
+                else:
+                    self.wfile.write(data)
+            self.wfile.flush()
+
+        def execute(app):
+            application_iter = app(environ, start_response)
+            try:
+                source = _sendfile_source(application_iter)
+                if source and self.server.ssl_context is None:
+                    write(b"")  # Headers
+                    if not state["chunked"]:
+                        file, offset, count = source
+                        self.connection.sendfile(file, offset, count)
+                        return
+                for data in application_iter:
+                    write(data)
+                if not state["sent"]:
+                    write(b"")
+                if state["chunked"]:
+                    self.wfile.write(b"0\r\n\r\n")
+                    self.wfile.flush()
+            finally:
+                if hasattr(application_iter, "close"):
+                    application_iter.close()
+
+        try:
+            execute(self.server.app)
+            if detach_callbacks and state["sent"] and not state["chunked"]:
+                self.close_connection = True
+                self.wfile.flush()
+                self.server.detach(self.request)
+                for callback in detach_callbacks:
+                    callback(self.request)
+                return
+            if body is not None:
+                body.exhaust()  # Unread request body must not be parsed as the next request
+        except (ConnectionError, socket.timeout) as e:
+            self.close_connection = True
+            self.connection_dropped(e, environ)
+        except Exception:
+            self.close_connection = True
+            if not state["sent"]:
+                try:
+                    state["status"] = None
+                    execute(InternalServerError())
+                except Exception:
+                    pass
+            self.server.log("error", f"Error on request:\n{traceback.format_exc()}")
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    multithread = True
+    daemon_threads = True
+
+    def __init__(self, host, port, app, threads=16, keepalive_timeout=5, io_timeout=300, on_shutdown=()):
+        handler = type('Handler', (KeepAliveRequestHandler,),
+                       {'keepalive_timeout': keepalive_timeout, 'io_timeout': io_timeout})
+        super().__init__(host, port, app, handler=handler)
+        self.threads = threads
+        self.on_shutdown = list(on_shutdown)
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="web")
+        self._active = {}  # request socket -> future
+        self._detached = set()  # Sockets handed over by their response, not ours to close
+        self._active_lock = threading.Lock()
+        self.stopping = False
+
+    def process_request(self, request, client_address):
+        if self.stopping:
+            self.shutdown_request(request)
+            return
+        with self._active_lock:
+            self._active[request] = self._executor.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            with self._active_lock:
+                self._active.pop(request, None)
+                detached = request in self._detached
+                self._detached.discard(request)
+            if not detached:
+                self.shutdown_request(request)
+
+    def detach(self, request):
+        with self._active_lock:
+            self._detached.add(request)
+
+    def stop(self, timeout=5.0):
+        """Graceful shutdown, safe to call from any thread but the serving one."""
+        if self.stopping:
+            return
+        self.stopping = True
+        logger.info("Web server stopping...")
+        self.shutdown()  # Stop accepting; returns once serve_forever has exited
+        for callback in self.on_shutdown:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Shutdown callback failed: {e}")
+        with self._active_lock:
+            requests = dict(self._active)
+        # Half-close: the current response is still written, but idle keep-alive
+        # connections see EOF and their worker returns immediately
+        for request in requests:
+            try:
+                request.shutdown(socket.SHUT_RD)
+            except OSError:
+                pass
+        _, pending = wait(list(requests.values()), timeout=timeout)
+        if pending:
+            logger.warning(f"{len(pending)} connection(s) still open after {timeout}s, closing anyway")
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        logger.info("Web server stopped.")
+
+
+def create_server(app, host, port, threads, keepalive_timeout, io_timeout=300, on_shutdown=()):
+    server = PooledWSGIServer(host, port, app, threads=threads, keepalive_timeout=keepalive_timeout,
+                              io_timeout=io_timeout, on_shutdown=on_shutdown)
+    logger.info(f"Serving on http://{host}:{port} ({threads} threads, keep-alive {keepalive_timeout}s)")
+    return server
@@ -1,7 +1,5 @@
 document.addEventListener('DOMContentLoaded', () => {
     // Elements
-    const slideImg = document.getElementById('slide-img');
-    const slideVideo = document.getElementById('slide-video');
     const loadingMessage = document.getElementById('loading-message');
     const statusText = document.getElementById('current-status');
     const dutyList = document.getElementById('duty-list');
@@ -32,12 +30,28 @@ document.addEventListener('DOMContentLoaded', () => {
     setInterval(updateClock, 1000);
     updateClock();
 
+    // Conditional GET: the server answers 304 (no body) when our copy is current
+    const etags = {};
+    async function fetchIfChanged(url) {
+        const headers = etags[url] ? { 'If-None-Match': etags[url] } : {};
+        const response = await fetch(url, { headers: headers, cache: 'no-store' });
+        if (response.status === 304) return null;
+        etags[url] = response.headers.get('ETag');
+        return response.json();
+    }
+
     // --- DATA UPDATES (Status, Teachers, Schedule) ---
     async function fetchStatus() {
         try {
-            const response = await fetch('/api/get_status');
-            const data = await response.json();
+            const data = await fetchIfChanged('/api/get_status');
+            if (data) applyStatus(data);
+        } catch (error) {
+            console.error('Status fetch error:', error);
+        }
+    }
 
+    function applyStatus(data) {
+        try {
             // Update Basic Status
             // statusText.textContent = data.status; // Old simple update
 
@@ -191,17 +205,8 @@ document.addEventListener('DOMContentLoaded', () => {
 
             // Update daily message (random or first)
             // Now uses 'quotes' array instead of 'messages'
-            if (data.quotes && data.quotes.length > 0) {
-                const randomQuote = data.quotes[Math.floor(Math.random() * data.quotes.length)];
-                dailyMessageEl.textContent = `"${randomQuote}"`;
-            } else if (data.messages && data.messages.length > 0) {
-                // Fallback if no quotes defined but messages exist (legacy support)
-                // remove this if strict separation desired, but good for transition
-                // dailyMessageEl.textContent = `"${data.messages[0]}"`; 
-                dailyMessageEl.textContent = "...";
-            } else {
-                dailyMessageEl.textContent = "...";
-            }
+            currentQuotes = data.quotes || [];
+            showRandomQuote();
 
             // Update Countdown
             if (data.countdown) {
@@ -231,12 +236,22 @@ document.addEventListener('DOMContentLoaded', () => {
             }
 
         } catch (error) {
-            console.error('Status fetch error:', error);
+            console.error('Status update error:', error);
+        }
+    }
+
+    let currentQuotes = [];
+    function showRandomQuote() {
+        if (!dailyMessageEl) return;
+        if (currentQuotes.length > 0) {
+            const randomQuote = currentQuotes[Math.floor(Math.random() * currentQuotes.length)];
+            dailyMessageEl.textContent = `"${randomQuote}"`;
+        } else {
+            dailyMessageEl.textContent = "...";
         }
     }
-    // Update status every 60 seconds (1 minute)
-    setInterval(fetchStatus, 60000);
-    fetchStatus();
+    // Status is pushed only on changes, so rotate the quote locally every minute
+    setInterval(showRandomQuote, 60000);
 
     // --- COUNTDOWN ---
     function updateCountdown(countdownData) {
@@ -268,29 +283,31 @@ document.addEventListener('DOMContentLoaded', () => {
     // --- SLIDESHOW LOGIC ---
     async function fetchSlides() {
         try {
-            const response = await fetch('/api/get_slides');
-            const newQueue = await response.json();
+            const newQueue = await fetchIfChanged('/api/get_slides');
+            if (newQueue) applySlides(newQueue);
+        } catch (error) {
+            console.error('Slide fetch error:', error);
+        }
+    }
 
-            if (newQueue.length === 0) {
-                slideQueue = [];
-                showNoSlides();
-            } else {
-                // If queue changed significantly or is empty, logic might need adjustment
-                const isDifferent = JSON.stringify(slideQueue) !== JSON.stringify(newQueue);
-                if (isDifferent) {
-                    slideQueue = newQueue;
-                    // Fix: Reset index if out of bounds, or start if stopped
-                    if (currentSlideIndex >= slideQueue.length) {
-                        currentSlideIndex = -1;
-                    }
+    function applySlides(newQueue) {
+        if (newQueue.length === 0) {
+            slideQueue = [];
+            showNoSlides();
+        } else {
+            // If queue changed significantly or is empty, logic might need adjustment
+            const isDifferent = JSON.stringify(slideQueue) !== JSON.stringify(newQueue);
+            if (isDifferent) {
+                slideQueue = newQueue;
+                // Fix: Reset index if out of bounds, or start if stopped
+                if (currentSlideIndex >= slideQueue.length) {
+                    currentSlideIndex = -1;
+                }
 
-                    if (currentSlideIndex === -1 && slideQueue.length > 0) {
-                        playNextSlide();
-                    }
+                if (currentSlideIndex === -1 && slideQueue.length > 0) {
+                    playNextSlide();
                 }
             }
-        } catch (error) {
-            console.error('Slide fetch error:', error);
         }
     }
 
@@ -300,137 +317,189 @@ document.addEventListener('DOMContentLoaded', () => {
     // Better: Update `data` object in fetchStatus is local to that function. 
     // We should make `slideshowConfig` global or update it from `fetchStatus`.
 
-    // Check for new slides every 60 seconds (1 minute) to reduce load
-    setInterval(fetchSlides, 60000);
-    fetchSlides();
-
     function showNoSlides() {
-        slideImg.style.display = 'none';
-        slideVideo.style.display = 'none';
-        slideVideo.pause();
+        clearTimeout(slideTimer);
+        slideToken++;
+        slideBuffers.forEach(buffer => {
+            hideElement(buffer.img);
+            hideElement(buffer.video);
+        });
         loadingMessage.style.display = 'block';
         loadingMessage.textContent = "Slayt bulunamadı. Bot üzerinden gönderim yapınız.";
     }
 
-    function playNextSlide() {
-        if (slideQueue.length === 0) {
-            showNoSlides();
-            currentSlideIndex = -1;
-            return;
+    // Two buffers (img + video each): the next slide is downloaded and decoded in
+    // the hidden one while the current slide is on screen, then they swap.
+    const slideBuffers = [0, 1].map(i => ({
+        img: document.getElementById(`slide-img-${i}`),
+        video: document.getElementById(`slide-video-${i}`),
+        url: null,
+        kind: null,
+        ready: null
+    }));
+    let frontBuffer = 0;
+    let slideToken = 0; // Bumped to cancel a pending swap (queue emptied, newer call)
+    const VIDEO_STALL_GRACE = 5; // seconds past a video's duration before skipping it
+
+    const exitClasses = {
+        'fade': 'fade-out',
+        'slide': 'slide-out-left',
+        'zoom': 'zoom-out',
+        'flip': 'flip-out',
+        'blur': 'blur-out',
+        'rotate': 'rotate-out',
+        'slide-up': 'slide-up-out',
+        'slide-down': 'slide-down-out'
+    };
+    const animationMap = {
+        'slide': 'slide-in-right',
+        'zoom': 'zoom-in',
+        'flip': 'flip-in',
+        'blur': 'blur-in',
+        'rotate': 'rotate-in',
+        'slide-up': 'slide-up-in',
+        'slide-down': 'slide-down-in'
+    };
+
+    function hideElement(el) {
+        el.style.display = 'none';
+        el.classList.remove('front');
+        if (el.tagName === 'VIDEO') {
+            el.onended = null;
+            el.pause();
         }
+    }
 
-        loadingMessage.style.display = 'none';
+    // Load (and decode) a slide into a hidden buffer; resolves when it can be shown instantly.
+    // Slides come from the media manifest: {name, url, kind, mime, width, height, duration}
+    function preloadInto(buffer, slide) {
+        const url = slide.url;
+        if (buffer.url === url && buffer.ready) return buffer.ready;
 
-        // Loop Logic
-        currentSlideIndex = (currentSlideIndex + 1) % slideQueue.length;
-        const filename = slideQueue[currentSlideIndex];
-        const url = `/static/slideshow/${filename}`;
-        const ext = filename.split('.').pop().toLowerCase();
+        buffer.url = url;
+        buffer.kind = slide.kind;
 
-        // Apply Fit Mode
+        if (buffer.kind === 'image') {
+            buffer.img.src = url;
+            buffer.ready = buffer.img.decode ? buffer.img.decode() : new Promise((resolve, reject) => {
+                buffer.img.onload = resolve;
+                buffer.img.onerror = reject;
+            });
+        } else if (buffer.kind === 'video') {
+            const video = buffer.video;
+            buffer.ready = new Promise((resolve, reject) => {
+                video.oncanplay = () => resolve();
+                video.onerror = () => reject(new Error('video error'));
+            });
+            video.preload = 'auto';
+            video.src = url;
+            video.load();
+        } else {
+            buffer.ready = Promise.reject(new Error('unsupported slide type'));
+        }
+
+        const ready = buffer.ready;
+        ready.catch(() => {
+            // Allow a retry on the next loop
+            if (buffer.ready === ready) buffer.ready = null;
+        });
+        return ready;
+    }
+
+    function showBuffer(incomingBuffer, outgoingBuffer) {
         const fitClass = slideshowConfig.fit_mode === 'cover' ? 'fit-cover' : 'fit-contain';
-        slideImg.className = fitClass;
-        slideVideo.className = fitClass;
 
         // Transition Effect Logic
         let effect = slideshowConfig.transition || 'fade';
-
         if (effect === 'random') {
             const effects = ['fade', 'slide', 'zoom', 'flip', 'blur', 'rotate', 'slide-up', 'slide-down'];
             effect = effects[Math.floor(Math.random() * effects.length)];
         }
 
-        // Force reflow
-        void slideImg.offsetWidth;
-
-        // Set Exit Class (Initial State)
-        const exitClasses = {
-            'fade': 'fade-out',
-            'slide': 'slide-out-left',
-            'zoom': 'zoom-out',
-            'flip': 'flip-out',
-            'blur': 'blur-out',
-            'rotate': 'rotate-out',
-            'slide-up': 'slide-up-out',
-            'slide-down': 'slide-down-out'
-        };
+        const incoming = incomingBuffer.kind === 'video' ? incomingBuffer.video : incomingBuffer.img;
+        const outgoing = [outgoingBuffer.img, outgoingBuffer.video].filter(el => el.style.display !== 'none');
 
-        if (exitClasses[effect]) {
-            slideImg.classList.add(exitClasses[effect]);
+        // Old slide plays its exit animation underneath the new one
+        outgoing.forEach(el => {
+            el.classList.remove('front');
+            el.classList.add(exitClasses[effect] || 'fade-out');
+            if (el.tagName === 'VIDEO') el.onended = null;
+        });
+
+        incoming.className = `slide-media ${fitClass} front`;
+        if (!animationMap[effect]) incoming.classList.add('fade-out');
+        incoming.style.display = 'block';
+        void incoming.offsetWidth; // Force reflow so the entry transition runs
+        if (animationMap[effect]) {
+            incoming.classList.add(animationMap[effect]);
         } else {
-            slideImg.classList.add('fade-out'); // Fallback
+            incoming.classList.remove('fade-out'); // Opacity goes back to 1 via base transition
         }
 
-        // Wait for exit animation (1s) before changing source
+        // Cleanup after the 1s animations
         setTimeout(() => {
-            if (['jpg', 'jpeg', 'png', 'gif'].includes(ext)) {
-                // IMAGE
-                slideVideo.style.display = 'none';
-                slideVideo.pause();
-
-                slideImg.onload = () => {
-                    slideImg.style.display = 'block';
-
-                    // Trigger Entry Animation: Remove 'out' classes
-                    slideImg.className = fitClass; // Reset classes to just fit mode
-
-                    // Add 'in' classes for animation
-                    const animationMap = {
-                        'slide': 'slide-in-right',
-                        'zoom': 'zoom-in',
-                        'flip': 'flip-in',
-                        'blur': 'blur-in',
-                        'rotate': 'rotate-in',
-                        'slide-up': 'slide-up-in',
-                        'slide-down': 'slide-down-in'
-                    };
+            outgoing.forEach(el => {
+                hideElement(el);
+                el.className = `slide-media ${fitClass}`;
+            });
+            if (animationMap[effect]) incoming.classList.remove(animationMap[effect]);
+        }, 1000);
+    }
 
-                    if (animationMap[effect]) {
-                        slideImg.classList.add(animationMap[effect]);
-                    } else {
-                        // For fade, we just removed fade-out, so opacity goes back to 1 via transition
-                        // No specific animation class needed if we rely on base transition
-                    }
+    async function playNextSlide() {
+        clearTimeout(slideTimer);
+        if (slideQueue.length === 0) {
+            showNoSlides();
+            currentSlideIndex = -1;
+            return;
+        }
 
-                    // Cleanup classes after animation ends
-                    setTimeout(() => {
-                        if (animationMap[effect]) {
-                            slideImg.classList.remove(animationMap[effect]);
-                        }
-                    }, 1000);
+        const token = ++slideToken;
 
-                    clearTimeout(slideTimer);
-                    slideTimer = setTimeout(playNextSlide, slideshowConfig.duration);
-                };
-                slideImg.onerror = () => {
-                    console.error("Image failed to load:", url);
-                    playNextSlide();
-                };
-                slideImg.src = url;
-
-            } else if (['mp4', 'webm'].includes(ext)) {
-                // VIDEO
-                slideImg.style.display = 'none';
-
-                slideVideo.src = url;
-                slideVideo.style.display = 'block';
-                slideVideo.load();
-                slideVideo.play().catch(e => {
-                    console.log("Autoplay prevented or error:", e);
-                    playNextSlide();
-                });
+        // Loop Logic
+        currentSlideIndex = (currentSlideIndex + 1) % slideQueue.length;
+        const slide = slideQueue[currentSlideIndex];
+        const incoming = slideBuffers[1 - frontBuffer];
+        const outgoing = slideBuffers[frontBuffer];
 
-                slideVideo.onended = () => {
-                    playNextSlide();
-                };
-                slideVideo.onerror = () => {
-                    console.error("Video failed to load:", url);
-                    playNextSlide();
-                };
-            } else {
+        try {
+            await preloadInto(incoming, slide);
+        } catch (e) {
+            console.error("Slide failed to load:", slide.name, e);
+            if (token === slideToken) slideTimer = setTimeout(playNextSlide, 1000);
+            return;
+        }
+        if (token !== slideToken) return; // Superseded while loading
+
+        loadingMessage.style.display = 'none';
+        if (incoming.kind === 'image') hideElement(incoming.video);
+        else hideElement(incoming.img);
+
+        showBuffer(incoming, outgoing);
+        frontBuffer = 1 - frontBuffer;
+
+        if (incoming.kind === 'video') {
+            const video = incoming.video;
+            video.currentTime = 0;
+            video.onended = () => playNextSlide();
+            video.play().catch(e => {
+                console.log("Autoplay prevented or error:", e);
                 playNextSlide();
+            });
+            // The manifest knows the length: move on even if the video stalls and never ends
+            if (slide.duration) {
+                slideTimer = setTimeout(playNextSlide, (slide.duration + VIDEO_STALL_GRACE) * 1000);
             }
-        }, 1000); // Wait 1s for exit animation
+        } else {
+            slideTimer = setTimeout(playNextSlide, slideshowConfig.duration);
+        }
+
+        // Once the old slide has left the screen, preload the following one into its buffer
+        setTimeout(() => {
+            if (token !== slideToken || slideQueue.length === 0) return;
+            const nextSlide = slideQueue[(currentSlideIndex + 1) % slideQueue.length];
+            preloadInto(outgoing, nextSlide).catch(() => {});
+        }, 1000);
     }
 
     // Hook to update config from fetchStatus (we need to modify fetchStatus slightly to expose data or write to global)
@@ -448,23 +517,26 @@ document.addEventListener('DOMContentLoaded', () => {
     async function fetchRiddles() {
         if (!document.getElementById('riddle-container')) return; // Exit if card not present
         try {
-            const response = await fetch('/api/riddles');
-            const newQueue = await response.json();
+            const newQueue = await fetchIfChanged('/api/riddles');
+            if (newQueue) applyRiddles(newQueue);
+        } catch (error) { console.error('Riddle fetch error:', error); }
+    }
 
-            if (newQueue.length === 0) {
-                riddleQueue = [];
-                showNoRiddles();
-            } else {
-                const isDifferent = JSON.stringify(riddleQueue) !== JSON.stringify(newQueue);
-                if (isDifferent) {
-                    riddleQueue = newQueue;
-                    if (currentRiddleIndex >= riddleQueue.length) currentRiddleIndex = -1;
-                    if (currentRiddleIndex === -1 && riddleQueue.length > 0) {
-                        playNextRiddle();
-                    }
+    function applyRiddles(newQueue) {
+        if (!document.getElementById('riddle-container')) return; // Exit if card not present
+        if (newQueue.length === 0) {
+            riddleQueue = [];
+            showNoRiddles();
+        } else {
+            const isDifferent = JSON.stringify(riddleQueue) !== JSON.stringify(newQueue);
+            if (isDifferent) {
+                riddleQueue = newQueue;
+                if (currentRiddleIndex >= riddleQueue.length) currentRiddleIndex = -1;
+                if (currentRiddleIndex === -1 && riddleQueue.length > 0) {
+                    playNextRiddle();
                 }
             }
-        } catch (error) { console.error('Riddle fetch error:', error); }
+        }
     }
 
     function showNoRiddles() {
@@ -474,6 +546,15 @@ document.addEventListener('DOMContentLoaded', () => {
         if (riddleEmpty) riddleEmpty.style.display = 'block';
     }
 
+    // Warm the browser cache (and decoder) with the next riddle image while this one is shown
+    function preloadNextRiddle() {
+        const next = riddleQueue[(currentRiddleIndex + 1) % riddleQueue.length];
+        if (!next || next.kind !== 'image') return;
+        const img = new Image();
+        img.src = next.url;
+        if (img.decode) img.decode().catch(() => {});
+    }
+
     function playNextRiddle() {
         if (riddleQueue.length === 0) {
             showNoRiddles();
@@ -484,8 +565,8 @@ document.addEventListener('DOMContentLoaded', () => {
         if (riddleEmpty) riddleEmpty.style.display = 'none';
 
         currentRiddleIndex = (currentRiddleIndex + 1) % riddleQueue.length;
-        const url = riddleQueue[currentRiddleIndex];
-        const ext = url.split('.').pop().toLowerCase();
+        const riddle = riddleQueue[currentRiddleIndex];
+        const url = riddle.url;
 
         // Standard fade effect for riddles
         if (riddleImg) {
@@ -494,7 +575,7 @@ document.addEventListener('DOMContentLoaded', () => {
         }
 
         setTimeout(() => {
-            if (['jpg', 'jpeg', 'png', 'gif', 'webp'].includes(ext)) {
+            if (riddle.kind === 'image') {
                 if (riddleVideo) { riddleVideo.style.display = 'none'; riddleVideo.pause(); }
                 if (riddleImg) {
                     riddleImg.onload = () => {
@@ -502,10 +583,11 @@ document.addEventListener('DOMContentLoaded', () => {
                         setTimeout(() => riddleImg.style.opacity = 1, 50);
                         clearTimeout(riddleTimer);
                         riddleTimer = setTimeout(playNextRiddle, 10000); // 10s per riddle
+                        preloadNextRiddle();
                     };
                     riddleImg.src = url;
                 }
-            } else if (['mp4', 'webm'].includes(ext)) {
+            } else if (riddle.kind === 'video') {
                 if (riddleImg) riddleImg.style.display = 'none';
                 if (riddleVideo) {
                     riddleVideo.src = url;
@@ -517,9 +599,66 @@ document.addEventListener('DOMContentLoaded', () => {
         }, 500);
     }
 
-    // Init Riddle Fetch
-    setInterval(fetchRiddles, 30000); // Check every 30s
-    fetchRiddles();
+    // --- LIVE UPDATES (SSE, polling as fallback) ---
+    let pollTimers = [];
+
+    function startPolling() {
+        if (pollTimers.length > 0) return;
+        fetchStatus();
+        fetchSlides();
+        fetchRiddles();
+        pollTimers = [
+            setInterval(fetchStatus, 60000), // Update status every 60 seconds (1 minute)
+            setInterval(fetchSlides, 60000), // Check for new slides every 60 seconds
+            setInterval(fetchRiddles, 30000) // Check riddles every 30s
+        ];
+    }
+
+    function stopPolling() {
+        pollTimers.forEach(timer => clearInterval(timer));
+        pollTimers = [];
+    }
+
+    function connectStream() {
+        if (!window.EventSource) {
+            startPolling();
+            return;
+        }
+
+        const source = new EventSource('/api/stream');
+        let watchdog = null;
+
+        // Server sends a ping every 15s; if nothing arrives for 45s assume the stream is dead
+        const keepAlive = () => {
+            clearTimeout(watchdog);
+            watchdog = setTimeout(() => {
+                source.close();
+                startPolling();
+                setTimeout(connectStream, 30000);
+            }, 45000);
+        };
+
+        source.addEventListener('open', () => {
+            stopPolling();
+            keepAlive();
+        });
+        source.addEventListener('ping', keepAlive);
+        source.addEventListener('status', e => { keepAlive(); applyStatus(JSON.parse(e.data)); });
+        source.addEventListener('slides', e => { keepAlive(); applySlides(JSON.parse(e.data)); });
+        source.addEventListener('riddles', e => { keepAlive(); applyRiddles(JSON.parse(e.data)); });
+
+        source.onerror = () => {
+            // Keep the screen fresh while the stream is down
+            startPolling();
+            if (source.readyState === EventSource.CLOSED) {
+                // Server refused (e.g. too many streams), the browser won't retry on its own
+                clearTimeout(watchdog);
+                setTimeout(connectStream, 30000);
+            }
+        };
+    }
+
+    connectStream();
 
     // --- CONTEXT MENU LOGIC ---
     const contextMenu = document.getElementById('custom-context-menu');
@@ -0,0 +1,230 @@
+"""
+Server-Sent Events fan-out for the kiosk screens.
+
+An open stream does not hold a web worker: once the response headers are
+written, the pooled server hands the connection over (see server.py, detach)
+and StreamHub keeps it. One hub thread owns every stream socket. It
+- checks the registered sources (cheap signatures such as the data version or
+  a directory mtime) and, when one changes, renders the event once and queues
+  the frame on every stream,
+- writes the queued bytes with non-blocking sends driven by a selector,
+- sends a heartbeat and notices clients that went away.
+An idle kiosk therefore costs one socket and no thread.
+"""
+import json
+import logging
+import selectors
+import socket
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+# A client that falls this far behind (stalled, not reading) is dropped; it reconnects
+MAX_CLIENT_BUFFER = 1024 * 1024
+
+
+def format_event(name, payload):
+    """Serialize one SSE frame."""
+    return f"event: {name}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+
+class StreamHub:
+    def __init__(self, render, max_clients=256, poll_interval=2.0, heartbeat=15.0):
+        self.render = render  # render(name) -> payload of event `name` (runs on the hub thread)
+        self.max_clients = max_clients
+        self.poll_interval = poll_interval
+        self.heartbeat = heartbeat
+        self._sources = {}
+        self._signatures = {}
+        self._clients = {}  # socket -> bytearray of unsent bytes
+        self._commands = deque()  # Work for the hub thread, see _run_commands
+        self._lock = threading.Lock()
+        self._thread = None
+        self._wakeup = None
+        self.closed = False
+
+    def add_source(self, name, signature):
+        """Register a change source. signature() must be cheap and comparable."""
+        self._sources[name] = signature
+
+    def accepting(self):
+        """False once the server is at capacity or shutting down (the kiosk then polls)."""
+        with self._lock:
+            return not self.closed and len(self._clients) + len(self._commands) < self.max_clients
+
+    def attach(self, sock):
+        """Take over a client connection whose response headers are already sent."""
+        self._command(('attach', sock))
+
+    def publish(self, name):
+        """Send event `name` (freshly rendered) to every connected client."""
+        self._command(('publish', name))
+
+    def refresh(self, name):
+        """A source is known to have changed: push it now instead of on the next poll."""
+        if name in self._sources:
+            self._command(('refresh', name))
+
+    def close(self):
+        """Server shutdown: end every open stream."""
+        with self._lock:
+            if self.closed:
+                return
+            self.closed = True
+        self._command(('close', None))
+
+    def _command(self, command):
+        with self._lock:
+            if self.closed and command[0] == 'attach':
+                command[1].close()
+                return
+            self._commands.append(command)
+            if self._thread is None:
+                self._wakeup = socket.socketpair()
+                self._thread = threading.Thread(target=self._run, name="StreamHub", daemon=True)
+                self._thread.start()
+            wakeup = self._wakeup[1]
+        try:
+            wakeup.send(b'\0')
+        except OSError:
+            pass  # Buffer full: the hub is awake anyway
+
+    # --- Hub thread ---
+
+    def _run(self):
+        selector = selectors.DefaultSelector()
+        wakeup = self._wakeup[0]
+        wakeup.setblocking(False)
+        selector.register(wakeup, selectors.EVENT_READ)
+        now = time.monotonic()
+        next_check, next_ping = now + self.poll_interval, now + self.heartbeat
+        while True:
+            timeout = max(0.0, min(next_check, next_ping) - time.monotonic())
+            for key, events in selector.select(timeout):
+                if key.fileobj is wakeup:
+                    try:
+                        while wakeup.recv(4096):
+                            pass
+                    except BlockingIOError:
+                        pass
+                    continue
+                if events & selectors.EVENT_READ:
+                    self._read(selector, key.fileobj)
+                if events & selectors.EVENT_WRITE and key.fileobj in self._clients:
+                    self._flush(selector, key.fileobj)
+            if not self._run_commands(selector):
+                break
+            now = time.monotonic()
+            if now >= next_check:
+                next_check = now + self.poll_interval
+                if self._clients:
+                    self._check_sources(selector)
+            if now >= next_ping:
+                next_ping = now + self.heartbeat
+                self._broadcast(selector, format_event('ping', {}).encode('utf-8'))
+        for sock in list(self._clients):
+            self._drop(selector, sock)
+        selector.close()
+
+    def _run_commands(self, selector):
+        """Returns False once the hub is closed."""
+        while True:
+            with self._lock:
+                if not self._commands:
+                    return True
+                action, arg = self._commands.popleft()
+            if action == 'attach':
+                self._add(selector, arg)
+            elif action == 'publish':
+                frame = self._frame(arg)
+                if frame:
+                    self._broadcast(selector, frame)
+            elif action == 'refresh':
+                self._check_source(selector, arg, send_first=True)
+            elif action == 'close':
+                for sock in list(self._clients):
+                    self._flush(selector, sock)
+                return False
+
+    def _frame(self, name):
+        try:
+            return format_event(name, self.render(name)).encode('utf-8')
+        except Exception as e:
+            logger.error(f"Stream event '{name}' failed: {e}")
+            return b''
+
+    def _add(self, selector, sock):
+        try:
+            sock.setblocking(False)
+            selector.register(sock, selectors.EVENT_READ)
+        except (OSError, ValueError):
+            sock.close()
+            return
+        # The full state first, so a reconnecting kiosk catches up
+        buffer = bytearray(b"retry: 5000\n\n")
+        for name in self._sources:
+            buffer += self._frame(name)
+        self._clients[sock] = buffer
+        self._flush(selector, sock)
+
+    def _broadcast(self, selector, frame):
+        for sock in list(self._clients):
+            self._clients[sock] += frame
+            self._flush(selector, sock)
+
+    def _flush(self, selector, sock):
+        buffer = self._clients[sock]
+        try:
+            while buffer:
+                sent = sock.send(buffer)
+                del buffer[:sent]
+        except BlockingIOError:
+            pass
+        except OSError:
+            self._drop(selector, sock)
+            return
+        if len(buffer) > MAX_CLIENT_BUFFER:
+            self._drop(selector, sock)
+            return
+        events = selectors.EVENT_READ | (selectors.EVENT_WRITE if buffer else 0)
+        selector.modify(sock, events)
+
+    def _read(self, selector, sock):
+        # Browsers send nothing on an event stream: data is ignored, EOF means gone
+        try:
+            if sock.recv(4096):
+                return
+        except BlockingIOError:
+            return
+        except OSError:
+            pass
+        self._drop(selector, sock)
+
+    def _drop(self, selector, sock):
+        self._clients.pop(sock, None)
+        try:
+            selector.unregister(sock)
+        except (KeyError, ValueError):
+            pass
+        sock.close()
+
+    def _check_sources(self, selector):
+        for name in self._sources:
+            self._check_source(selector, name)
+
+    def _check_source(self, selector, name, send_first=False):
+        """Broadcast `name` if its signature changed (only the hub thread keeps signatures)."""
+        try:
+            sig = self._sources[name]()
+        except Exception as e:
+            logger.error(f"Stream source '{name}' failed: {e}")
+            return
+        known = name in self._signatures
+        changed = self._signatures.get(name) != sig
+        self._signatures[name] = sig
+        if changed and (known or send_first) and self._clients:
+            frame = self._frame(name)
+            if frame:
+                self._broadcast(selector, frame)